@@ -1,107 +1,214 @@
+import argparse
 import json
+import os
 import sys
+import tempfile
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, TextIO
 
 from mcp.server.fastmcp import FastMCP
 
-from src.source_analyzer import SourceAnalyzer
+from src.daemon import default_socket_path, request, serve
+from src.service import RelationService
+from src.spill import DEFAULT_MEMORY_LIMIT_MB, open_export, spill_to_stream
 
 # Initialize MCP server
 mcp = FastMCP("source-relation")
 
+# ファイル解析の並列数
+PARSE_WORKERS = min(8, os.cpu_count() or 1)
 
-def analyze_dependencies_recursively(
-    analyzer: SourceAnalyzer, file_path: str, analyzed_files: Set[str]
-) -> Dict[str, List[str]]:
-    """ファイルの依存関係を再帰的に解析する
+# デーモンが起動していない場合にプロセス内で使うサービス
+service = RelationService(parse_workers=PARSE_WORKERS)
+
+
+def dispatch(method: str, **params: object) -> Dict[str, object]:
+    """デーモンが起動していればクエリを転送し、それ以外はプロセス内で処理する
 
     Args:
-        analyzer (SourceAnalyzer): 解析を行うアナライザーインスタンス
-        file_path (str): 解析対象のファイルパス
-        analyzed_files (Set[str]): 解析済みファイルのセット
+        method (str): 呼び出すサービスのメソッド名
+        **params: メソッドの引数（パスは絶対パスで渡す）
 
     Returns:
-        Dict[str, List[str]]: 解析されたすべての依存関係の辞書
+        Dict[str, object]: 解析結果
     """
-    if file_path in analyzed_files:
-        return {}
+    try:
+        return request(default_socket_path(), method, params)
+    except OSError:
+        return getattr(service, method)(**params)
 
-    analyzed_files.add(file_path)
-    dependencies: Dict[str, List[str]] = {}
 
-    # ファイルを解析
-    try:
-        current_deps = analyzer.analyze_single_file(Path(file_path))
-        direct_dependencies = current_deps.get(file_path, [])
-        dependencies[file_path] = direct_dependencies
+def spill_source_relation(
+    path: str,
+    out: TextIO,
+    db_path: Optional[str] = None,
+    memory_limit_mb: int = DEFAULT_MEMORY_LIMIT_MB,
+    dependents_of: Optional[List[str]] = None,
+) -> int:
+    """依存関係をディスクに退避しながら解析し、結果を逐次書き出す
 
-        # 各依存ファイルについても再帰的に解析
-        for dependency in direct_dependencies:
-            if dependency not in analyzed_files:
-                nested_deps = analyze_dependencies_recursively(
-                    analyzer, dependency, analyzed_files
-                )
-                dependencies.update(nested_deps)
-    except Exception:
-        pass
+    Args:
+        path (str): 解析対象のファイルまたはディレクトリのパス
+        out (TextIO): 書き出し先
+        db_path (Optional[str]): ストアのデータベースファイル。省略時は一時ファイル
+        memory_limit_mb (int): SQLiteが使用するメモリの上限（MB）
+        dependents_of (Optional[List[str]]): 逆依存を書き出すファイル
+
+    Returns:
+        int: 書き出したファイル数
+    """
+    if db_path is not None:
+        return spill_to_stream(
+            path, out, db_path, memory_limit_mb, dependents_of, PARSE_WORKERS
+        )
 
-    return dependencies
+    with tempfile.TemporaryDirectory(prefix="source-relation-") as temp_dir:
+        return spill_to_stream(
+            path,
+            out,
+            os.path.join(temp_dir, "graph.db"),
+            memory_limit_mb,
+            dependents_of,
+            PARSE_WORKERS,
+        )
 
 
 @mcp.prompt()
 def source_relation(path: str) -> str:
     """Return a prompt"""
-    path_obj = Path(path)
-    base_dir = str(path_obj.parent if path_obj.is_file() else path_obj)
-    analyzer = SourceAnalyzer(base_dir)
-
-    # ソースコードを解析
-    if path_obj.is_file():
-        analyzed_files: Set[str] = set()
-        file_path = str(path_obj.absolute())
-        dependencies = analyze_dependencies_recursively(
-            analyzer, file_path, analyzed_files
-        )
-    else:
-        dependencies = analyzer.analyze_directory()
+    result = dispatch("get_source_relation", path=str(Path(path).absolute()))
 
-    # 結果をまとめる
-    result = {"dependencies": dependencies}
+    return json.dumps(result, indent=2, ensure_ascii=False)
+
+
+@mcp.tool()
+def get_source_relation(
+    path: str,
+    since: Optional[str] = None,
+    mode: str = "closure",
+    relative: bool = False,
+    closure_for: Optional[List[str]] = None,
+) -> str:
+    """Analyze dependencies between source files
+
+    Pass the version returned by a previous call as `since` to receive only
+    the edges added, removed or changed since then.
+
+    `mode="closure"` returns the full transitive dependencies of every file.
+    `mode="direct"` returns only the direct import edges as a path table
+    (`paths`) and index lists (`edges`); the transitive dependencies of the
+    files listed in `closure_for` are computed on demand. `relative=True`
+    reports paths relative to the project root in closure mode.
+    """
+    result = dispatch(
+        "get_source_relation",
+        path=str(Path(path).absolute()),
+        since=since,
+        mode=mode,
+        relative=relative,
+        closure_for=closure_for,
+    )
 
     return json.dumps(result, indent=2, ensure_ascii=False)
 
 
 @mcp.tool()
-def get_source_relation(path: str) -> str:
-    """Analyze dependencies between source files"""
-    path_obj = Path(path)
-    base_dir = str(path_obj.parent if path_obj.is_file() else path_obj)
-    analyzer = SourceAnalyzer(base_dir)
-
-    # ソースコードを解析
-    if path_obj.is_file():
-        analyzed_files: Set[str] = set()
-        file_path = str(path_obj.absolute())
-        dependencies = analyze_dependencies_recursively(
-            analyzer, file_path, analyzed_files
+def get_source_relations(paths: List[str]) -> str:
+    """Analyze dependencies of multiple files and directories in one call
+
+    Targets with the same base directory share one analysis graph, so their
+    common dependencies are parsed only once. Across base directories, parse
+    results are shared when import resolution is configured the same way
+    (same tsconfig aliases for TypeScript/JavaScript, always for Rust); Python
+    and Ruby search paths depend on the base directory, so those files are not
+    shared between directories.
+    """
+    absolute_paths = [str(Path(path).absolute()) for path in paths]
+    results = dispatch("get_source_relations", paths=absolute_paths)["results"]
+
+    # 結果をまとめる（キーは指定されたパスのまま）
+    result = {
+        "results": {
+            path: results[absolute_path]
+            for path, absolute_path in zip(paths, absolute_paths)
+        }
+    }
+
+    return json.dumps(result, indent=2, ensure_ascii=False)
+
+
+@mcp.tool()
+def export_source_relation(
+    path: str,
+    output_path: str,
+    memory_limit_mb: int = DEFAULT_MEMORY_LIMIT_MB,
+    dependents_of: Optional[List[str]] = None,
+) -> str:
+    """Analyze a huge repository with bounded memory and write the result to a file
+
+    Edges are spilled to an on-disk store while parsing, and the transitive
+    dependencies (or, with `dependents_of`, the transitive dependents of the
+    given files) are streamed to `output_path` as JSON. `output_path` must be
+    a new file inside the export directory (SOURCE_RELATION_EXPORT_DIR, or a
+    private temporary directory by default); relative paths are resolved
+    against it and existing files are never overwritten.
+    """
+    with open_export(output_path) as (output, out):
+        count = spill_source_relation(
+            str(Path(path).absolute()),
+            out,
+            memory_limit_mb=memory_limit_mb,
+            dependents_of=dependents_of,
         )
-    else:
-        dependencies = analyzer.analyze_directory()
 
     # 結果をまとめる
-    result = {"dependencies": dependencies}
+    result = {"output": str(output), "files": count}
 
     return json.dumps(result, indent=2, ensure_ascii=False)
 
 
+def run_spill(args: List[str]) -> None:
+    """spill サブコマンドを実行する
+
+    Args:
+        args (List[str]): サブコマンドの引数
+    """
+    parser = argparse.ArgumentParser(prog="source_relation.py spill")
+    parser.add_argument("path")
+    parser.add_argument("--db", dest="db_path")
+    parser.add_argument(
+        "--memory-mb", type=int, default=DEFAULT_MEMORY_LIMIT_MB, dest="memory_mb"
+    )
+    parser.add_argument("--dependents-of", action="append", dest="dependents_of")
+    options = parser.parse_args(args)
+
+    spill_source_relation(
+        options.path,
+        sys.stdout,
+        options.db_path,
+        options.memory_mb,
+        options.dependents_of,
+    )
+
+
 if __name__ == "__main__":
     args = sys.argv[1:]
 
     if not args:
         mcp.run(transport="stdio")
+    elif args[0] == "daemon" and len(args) <= 2:
+        socket_path = args[1] if len(args) == 2 else default_socket_path()
+        print(f"Listening on {socket_path}", file=sys.stderr)
+        try:
+            serve(service, socket_path)
+        except KeyboardInterrupt:
+            pass
+    elif args[0] == "spill" and len(args) >= 2:
+        run_spill(args[1:])
     elif args[0] == "test" and len(args) == 2:
         print(get_source_relation(args[1]))
+    elif args[0] == "test" and len(args) > 2:
+        print(get_source_relations(args[1:]))
     else:
         print("""使用方法:
 1. MCPサーバーとして実行:
@@ -110,4 +217,14 @@ if __name__ == "__main__":
 2. コマンドラインツールとして実行:
    uv run source_relation.py test /path/to/project または
    uv run source_relation.py test /path/to/file
+
+3. 複数の対象をまとめて解析:
+   uv run source_relation.py test /path/to/file1 /path/to/file2 /path/to/dir
+
+4. 共有デーモンとして実行（MCPサーバーとコマンドラインツールが自動的に利用）:
+   uv run source_relation.py daemon [/path/to/socket]
+
+5. 巨大なリポジトリをメモリ上限付きで解析（結果は逐次出力）:
+   uv run source_relation.py spill /path/to/project [--db graph.db] [--memory-mb 64]
+   uv run source_relation.py spill /path/to/project --dependents-of path/to/file
 """)
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Set
+from typing import Set, Tuple
 
 from ..utils.path import normalize_path, resolve_relative_path
 
@@ -30,6 +30,16 @@ class BaseAnalyzer(ABC):
         """
         pass
 
+    def resolution_key(self) -> Tuple[str, ...]:
+        """インポートの解決設定を表すキーを返す
+
+        Notes:
+            - キーが同じアナライザーは、同じファイルから同じ解析結果を得る
+            - 既定ではインポート元のファイルからの相対パスのみで解決するため、
+              基準ディレクトリに依存しない
+        """
+        return (type(self).__name__,)
+
     def supports_file(self, file_path: Path) -> bool:
         """このアナライザーがファイルをサポートしているかどうかを判定する"""
         return file_path.suffix in self.file_extensions
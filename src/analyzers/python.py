@@ -1,8 +1,8 @@
 import ast
 from pathlib import Path
-from typing import Optional, Set
+from typing import Optional, Set, Tuple
 
-from ..utils.path import search_in_path
+from ..utils.path import path_exists, search_in_path
 from .base import BaseAnalyzer
 
 
@@ -30,6 +30,13 @@ class PythonAnalyzer(BaseAnalyzer):
         """
         return [".py"]
 
+    def resolution_key(self) -> Tuple[str, ...]:
+        """インポートの解決設定を表すキーを返す（検索パスを含む）"""
+        return (
+            *super().resolution_key(),
+            *(str(path.absolute()) for path in self.search_paths),
+        )
+
     def resolve_relative_path(
         self, import_name: str, current_file: Path, allow_init: bool = True
     ) -> Optional[Path]:
@@ -56,7 +63,7 @@ class PythonAnalyzer(BaseAnalyzer):
             current_dir = current_file.parent
             for pattern in patterns:
                 potential_path = current_dir / pattern
-                if potential_path.exists():
+                if path_exists(potential_path):
                     return potential_path
 
             return None
@@ -1,6 +1,6 @@
 import re
 from pathlib import Path
-from typing import Set
+from typing import Set, Tuple
 
 from ..utils.path import search_in_path
 from .base import BaseAnalyzer
@@ -22,6 +22,13 @@ class RubyAnalyzer(BaseAnalyzer):
     def file_extensions(self) -> list[str]:
         return [".rb"]
 
+    def resolution_key(self) -> Tuple[str, ...]:
+        """インポートの解決設定を表すキーを返す（検索パスを含む）"""
+        return (
+            *super().resolution_key(),
+            *(str(path.absolute()) for path in self.search_paths),
+        )
+
     def analyze_imports(self, content: str, file_path: Path) -> Set[str]:
         imports = set()
         patterns = [
@@ -2,6 +2,7 @@ import re
 from pathlib import Path
 from typing import Set
 
+from ..utils.path import path_exists
 from .base import BaseAnalyzer
 
 
@@ -29,13 +30,13 @@ class RustAnalyzer(BaseAnalyzer):
                 for component in components:
                     # modディレクトリ内のファイルをチェック
                     mod_file = current_dir / component / "mod.rs"
-                    if mod_file.exists():
+                    if path_exists(mod_file):
                         normalized_path = self.normalize_path(mod_file)
                         imports.add(normalized_path)
 
                     # 直接のRustファイルをチェック
                     rs_file = current_dir / f"{component}.rs"
-                    if rs_file.exists():
+                    if path_exists(rs_file):
                         normalized_path = self.normalize_path(rs_file)
                         imports.add(normalized_path)
 
@@ -1,6 +1,7 @@
+import json
 import re
 from pathlib import Path
-from typing import Set
+from typing import Set, Tuple
 
 from ..configs.typescript import TypeScriptConfig
 from .base import BaseAnalyzer
@@ -17,6 +18,17 @@ class TypeScriptAnalyzer(BaseAnalyzer):
     def file_extensions(self) -> list[str]:
         return [".ts", ".tsx", ".js", ".jsx"]
 
+    def resolution_key(self) -> Tuple[str, ...]:
+        """インポートの解決設定を表すキーを返す（tsconfig.json のエイリアスを含む）"""
+        if not self.ts_config.paths:
+            # エイリアスがなければ相対パスのみで解決する
+            return super().resolution_key()
+        return (
+            *super().resolution_key(),
+            json.dumps(self.ts_config.paths, sort_keys=True),
+            str((self.ts_config.base_dir / self.ts_config.base_url).absolute()),
+        )
+
     def analyze_imports(self, content: str, file_path: Path) -> Set[str]:
         imports = set()
         patterns = [
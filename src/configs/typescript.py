@@ -5,6 +5,8 @@ from typing import Dict, List, Optional
 
 import json5
 
+from ..utils.path import path_exists
+
 
 class TypeScriptConfig:
     """TypeScript設定を管理するクラス"""
@@ -81,12 +83,12 @@ class TypeScriptConfig:
                     # 拡張子の補完を試みる
                     for ext in [".ts", ".tsx", ".js", ".jsx"]:
                         test_path = full_path.with_suffix(ext)
-                        if test_path.exists():
+                        if path_exists(test_path):
                             return test_path
 
                         # index.tsなどのパターンもチェック
                         index_path = full_path / f"index{ext}"
-                        if index_path.exists():
+                        if path_exists(index_path):
                             return index_path
 
         return None
@@ -0,0 +1,223 @@
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+from .service import RelationService
+from .utils.path import ensure_private_dir
+
+# デーモンのソケットパスを指定する環境変数
+SOCKET_ENV = "SOURCE_RELATION_SOCKET"
+
+# デーモンへの接続タイムアウト（秒）
+CONNECT_TIMEOUT = 1.0
+
+# 接続待ちキューの長さ
+LISTEN_BACKLOG = 64
+
+
+class DaemonError(Exception):
+    """デーモンがクエリの処理に失敗したことを示す例外"""
+
+
+def _private_socket_dir() -> Path:
+    """XDG_RUNTIME_DIR がない場合に使うユーザー専用のディレクトリを返す"""
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return Path(tempfile.gettempdir()) / f"source-relation-{uid}"
+
+
+def default_socket_path() -> str:
+    """デーモンのソケットパスを返す
+
+    Notes:
+        - XDG_RUNTIME_DIR がない場合は、共有の一時ディレクトリに直接置かず、
+          ユーザー専用（0700）のサブディレクトリを使う
+
+    Returns:
+        str: 環境変数 SOURCE_RELATION_SOCKET、または実行時ディレクトリ内の既定のパス
+    """
+    socket_path = os.environ.get(SOCKET_ENV)
+    if socket_path:
+        return socket_path
+
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "source-relation.sock")
+    return str(_private_socket_dir() / "daemon.sock")
+
+
+def _check_socket_owner(socket_path: str) -> None:
+    """ソケットが現在のユーザーの所有であることを確認する
+
+    Raises:
+        PermissionError: 他のユーザーが作成したソケット、またはソケット以外の場合
+    """
+    if not hasattr(os, "getuid"):
+        return
+    info = os.lstat(socket_path)
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"{socket_path} is not a socket owned by this user")
+
+
+def _remove_own_socket(socket_path: str) -> None:
+    """ソケットパスが自分のソケットのままであれば削除する"""
+    try:
+        _check_socket_owner(socket_path)
+        os.unlink(socket_path)
+    except OSError:
+        pass
+
+
+def request(socket_path: str, method: str, params: Dict[str, object]) -> object:
+    """デーモンにクエリを送信して結果を受け取る
+
+    Args:
+        socket_path (str): デーモンのソケットパス
+        method (str): 呼び出すメソッド名
+        params (Dict[str, object]): メソッドの引数
+
+    Returns:
+        object: メソッドの結果
+
+    Raises:
+        OSError: デーモンに接続できない場合、またはソケットが他のユーザーの所有の場合
+        DaemonError: デーモンがエラーを返した場合
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        raise ConnectionError("Unix domain sockets are not supported")
+    # 他のユーザーが用意したソケットにはクエリ（パス）を送らない
+    _check_socket_owner(socket_path)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(socket_path)
+        # 解析には時間がかかる場合があるため、応答はタイムアウトなしで待つ
+        sock.settimeout(None)
+
+        message = {"method": method, "params": params}
+        sock.sendall(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+
+    if not line:
+        raise ConnectionError(f"Daemon at {socket_path} closed the connection")
+
+    response = json.loads(line)
+    if "error" in response:
+        raise DaemonError(response["error"])
+    return response["result"]
+
+
+def dispatch(service: RelationService, message: Dict[str, object]) -> Dict[str, object]:
+    """受信したクエリをサービスのメソッドに振り分ける
+
+    Args:
+        service (RelationService): クエリを処理するサービス
+        message (Dict[str, object]): method と params からなるクエリ
+
+    Returns:
+        Dict[str, object]: result またはエラーメッセージ（error）
+    """
+    method = message.get("method")
+    params = message.get("params") or {}
+    if method not in RelationService.METHODS:
+        return {"error": f"Unknown method: {method}"}
+    if not isinstance(params, dict):
+        return {"error": "params must be an object"}
+
+    try:
+        return {"result": getattr(service, method)(**params)}
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """1行に1つのJSONクエリを受け取り、1行のJSONで応答するハンドラー"""
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError as e:
+                response: Dict[str, object] = {"error": f"Invalid request: {e}"}
+            else:
+                response = dispatch(self.server.service, message)
+
+            self.wfile.write(
+                json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n"
+            )
+            self.wfile.flush()
+
+
+def _is_listening(socket_path: str) -> bool:
+    """ソケットパスで稼働中のデーモンがあるかを判定する"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
+
+
+def serve(service: RelationService, socket_path: str) -> None:
+    """Unixドメインソケットでクエリを受け付けるデーモンを起動する
+
+    Notes:
+        - クエリごとにスレッドで処理し、グラフの読み取り・更新の排他はサービスが行う
+        - ソケットは起動したユーザーのみが接続できる
+
+    Args:
+        service (RelationService): グラフとキャッシュを保持するサービス
+        socket_path (str): 待ち受けるソケットパス
+
+    Raises:
+        RuntimeError: Unixドメインソケットが使えない場合、または既にデーモンが稼働中の場合
+        PermissionError: 既定のソケットディレクトリが他のユーザーの所有の場合、
+            またはソケットパスに自分のソケット以外のファイルがある場合
+    """
+    if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+        raise RuntimeError("Unix domain sockets are not supported on this platform")
+    if Path(socket_path).parent == _private_socket_dir():
+        ensure_private_dir(_private_socket_dir())
+    if _is_listening(socket_path):
+        raise RuntimeError(f"Daemon is already running at {socket_path}")
+
+    # 前回の異常終了で残ったソケットファイルを削除（通常のファイルや他のユーザーの
+    # ソケットは削除せずに起動を中止する）
+    if os.path.lexists(socket_path):
+        _check_socket_owner(socket_path)
+        os.unlink(socket_path)
+
+    server = socketserver.ThreadingUnixStreamServer(
+        socket_path, _RequestHandler, bind_and_activate=False
+    )
+    server.daemon_threads = True
+    # 複数のクライアントからの同時接続に備えて待ち受けキューを広げる
+    server.request_queue_size = LISTEN_BACKLOG
+    server.service = service  # type: ignore[attr-defined]
+
+    old_umask = os.umask(0o177)
+    try:
+        server.server_bind()
+        server.server_activate()
+    except OSError:
+        server.server_close()
+        raise
+    finally:
+        os.umask(old_umask)
+
+    # SIGTERMでもソケットファイルを削除して終了する
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        _remove_own_socket(socket_path)
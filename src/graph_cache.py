@@ -0,0 +1,213 @@
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+# 比較・差分計算用に正規化したグラフ（ファイルパス -> ソート済みの依存先）
+Snapshot = Dict[str, Tuple[str, ...]]
+
+
+def _snapshot(graph: Dict[str, List[str]]) -> Snapshot:
+    """グラフを順序に依存しない形に正規化する"""
+    return {path: tuple(sorted(set(deps))) for path, deps in graph.items()}
+
+
+def diff_graphs(
+    old: Dict[str, List[str]], new: Dict[str, List[str]]
+) -> Dict[str, object]:
+    """2つのグラフ間で追加・削除・変更されたエッジを求める
+
+    Args:
+        old (Dict[str, List[str]]): 変更前のグラフ
+        new (Dict[str, List[str]]): 変更後のグラフ
+
+    Returns:
+        Dict[str, object]: 追加されたファイルとその依存先（added）、
+            削除されたファイル（removed）、依存先が変化したファイルごとの
+            追加・削除されたエッジ（changed）
+    """
+    old_snapshot = _snapshot(old)
+    new_snapshot = _snapshot(new)
+
+    added = {
+        path: list(deps)
+        for path, deps in new_snapshot.items()
+        if path not in old_snapshot
+    }
+    removed = sorted(path for path in old_snapshot if path not in new_snapshot)
+
+    changed: Dict[str, Dict[str, List[str]]] = {}
+    for path, deps in new_snapshot.items():
+        previous = old_snapshot.get(path)
+        if previous is None or previous == deps:
+            continue
+        changed[path] = {
+            "added": sorted(set(deps) - set(previous)),
+            "removed": sorted(set(previous) - set(deps)),
+        }
+
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+class GraphCache:
+    """解析結果のグラフをバージョン付きで保持するキャッシュ
+
+    バージョンは "<インスタンスID>:<連番>" 形式の文字列で、連番はすべての
+    グラフで共有する単調増加の整数として、グラフの内容が変化したときにのみ
+    更新される。インスタンスIDはプロセスごとに異なるため、別のプロセスや
+    再起動前のデーモンが発行したバージョンは未知のものとして扱われる。
+    グラフごとに直近のバージョンを保持し、差分応答の基準として利用する。
+
+    保持するグラフの数は max_graphs までに制限し、最も長く使われていない
+    グラフから破棄する。再帰的な依存関係のグラフはファイル数の2乗に比例して
+    大きくなりうるため、保持するすべてのバージョンの要素数（ファイル数と
+    エッジ数の合計）も max_entries までに制限し、最も長く使われていない
+    グラフの古いバージョンから破棄する。直前のバージョンと同じ依存先は
+    同じオブジェクトを共有して保持する。
+
+    Attributes:
+        max_history (int): グラフごとに保持するバージョン数
+        max_graphs (int): 保持するグラフの最大数
+        max_entries (int): 保持するすべてのバージョンの要素数の上限
+        instance_id (str): このキャッシュが発行するバージョンの識別子
+    """
+
+    def __init__(
+        self, max_history: int = 8, max_graphs: int = 64, max_entries: int = 1_000_000
+    ):
+        self.max_history = max(1, max_history)
+        self.max_graphs = max(1, max_graphs)
+        self.max_entries = max(1, max_entries)
+        self.instance_id = uuid.uuid4().hex[:12]
+        # キーごとのバージョン -> (スナップショット, 要素数)
+        self._graphs: "OrderedDict[str, OrderedDict[int, Tuple[Snapshot, int]]]" = (
+            OrderedDict()
+        )
+        self._total_entries = 0
+        # グループ（プロジェクトなど）ごとのグラフのキー
+        self._groups: Dict[str, Set[str]] = {}
+        self._key_groups: Dict[str, str] = {}
+        self._last_version = 0
+        self._lock = threading.Lock()
+
+    def _format_version(self, number: int) -> str:
+        """連番をバージョン文字列に変換する"""
+        return f"{self.instance_id}:{number}"
+
+    def _parse_version(self, version: str) -> Optional[int]:
+        """このキャッシュが発行したバージョンの連番を返す（それ以外はNone）"""
+        instance_id, _, number = str(version).partition(":")
+        if instance_id != self.instance_id or not number.isdigit():
+            return None
+        return int(number)
+
+    def update(
+        self, key: str, graph: Dict[str, List[str]], group: Optional[str] = None
+    ) -> str:
+        """グラフを登録し、そのバージョンを返す
+
+        Args:
+            key (str): グラフを識別するキー（解析対象のパスなど）
+            graph (Dict[str, List[str]]): 最新のグラフ
+            group (Optional[str]): まとめて破棄するためのグループ
+
+        Returns:
+            str: グラフのバージョン。内容が前回と同じ場合は前回のバージョン
+        """
+        snapshot = _snapshot(graph)
+        with self._lock:
+            history = self._graphs.setdefault(key, OrderedDict())
+            self._graphs.move_to_end(key)
+            if group is not None and key not in self._key_groups:
+                self._key_groups[key] = group
+                self._groups.setdefault(group, set()).add(key)
+            while len(self._graphs) > self.max_graphs:
+                self._remove(next(iter(self._graphs)))
+
+            if history:
+                latest_version, (latest, _) = next(reversed(history.items()))
+                if latest == snapshot:
+                    return self._format_version(latest_version)
+                # 変化のない依存先は直前のバージョンと同じオブジェクトを共有する
+                for path, deps in snapshot.items():
+                    previous = latest.get(path)
+                    if previous == deps:
+                        snapshot[path] = previous
+
+            self._last_version += 1
+            size = len(snapshot) + sum(len(deps) for deps in snapshot.values())
+            history[self._last_version] = (snapshot, size)
+            self._total_entries += size
+            while len(history) > self.max_history:
+                self._pop_oldest(key)
+            self._trim(key)
+            return self._format_version(self._last_version)
+
+    def get(self, key: str, version: str) -> Optional[Dict[str, List[str]]]:
+        """指定したバージョンのグラフを取得する
+
+        Args:
+            key (str): グラフを識別するキー
+            version (str): バージョン
+
+        Returns:
+            Optional[Dict[str, List[str]]]: グラフ。保持されていない場合や
+                別のインスタンスが発行したバージョンの場合はNone
+        """
+        number = self._parse_version(version)
+        if number is None:
+            return None
+        with self._lock:
+            entry = self._graphs.get(key, {}).get(number)
+        if entry is None:
+            return None
+        snapshot, _ = entry
+        return {path: list(deps) for path, deps in snapshot.items()}
+
+    def discard_group(self, group: str) -> None:
+        """グループに属するすべてのグラフを破棄する
+
+        Args:
+            group (str): 破棄するグループ
+        """
+        with self._lock:
+            for key in list(self._groups.get(group, ())):
+                self._remove(key)
+
+    def _trim(self, protected: str) -> None:
+        """要素数の合計が上限以下になるまで古いバージョンを破棄する
+
+        Notes:
+            - ロックを保持した状態で呼び出す
+            - protected の最新のバージョンは未変更の判定に使うため破棄しない
+
+        Args:
+            protected (str): 最新のバージョンを残すグラフのキー
+        """
+        while self._total_entries > self.max_entries:
+            for key, history in self._graphs.items():
+                if key != protected or len(history) > 1:
+                    break
+            else:
+                return
+            self._pop_oldest(key)
+
+    def _pop_oldest(self, key: str) -> None:
+        """グラフの最も古いバージョンを破棄する（ロックを保持した状態で呼び出す）"""
+        history = self._graphs[key]
+        _, (_, size) = history.popitem(last=False)
+        self._total_entries -= size
+        if not history:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        """グラフを破棄する（ロックを保持した状態で呼び出す）"""
+        history = self._graphs.pop(key, None)
+        if history:
+            self._total_entries -= sum(size for _, size in history.values())
+        group = self._key_groups.pop(key, None)
+        if group is not None:
+            keys = self._groups[group]
+            keys.discard(key)
+            if not keys:
+                del self._groups[group]
@@ -0,0 +1,76 @@
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+from .utils.path import relative_path
+
+# 出力モード（closure: 再帰的な依存関係、direct: 直接のインポートのみ）
+OUTPUT_MODES = ("closure", "direct")
+
+
+def relativize_dependencies(
+    dependencies: Dict[str, List[str]], root: Path
+) -> Dict[str, List[str]]:
+    """依存関係のパスをプロジェクトルートからの相対パスに変換する
+
+    Args:
+        dependencies (Dict[str, List[str]]): 絶対パスの依存関係
+        root (Path): プロジェクトルート
+
+    Returns:
+        Dict[str, List[str]]: 相対パスの依存関係
+    """
+    return {
+        relative_path(path, root): [relative_path(dep, root) for dep in deps]
+        for path, deps in dependencies.items()
+    }
+
+
+def direct_dependencies(
+    files: Iterable[str], dependencies: Dict[str, Set[str]], root: Path
+) -> Dict[str, List[str]]:
+    """ファイルごとの直接のインポートを相対パスで取得する
+
+    Args:
+        files (Iterable[str]): 対象ファイルの正規化されたパス
+        dependencies (Dict[str, Set[str]]): アナライザーが保持する依存関係グラフ
+        root (Path): プロジェクトルート
+
+    Returns:
+        Dict[str, List[str]]: 相対パスでの直接の依存関係
+    """
+    return {
+        relative_path(path, root): sorted(
+            relative_path(dep, root) for dep in dependencies.get(path, set())
+        )
+        for path in files
+    }
+
+
+def build_edge_table(direct: Dict[str, List[str]], root: Path) -> Dict[str, object]:
+    """直接の依存関係をパス表とインデックスのエッジに変換する
+
+    Notes:
+        - paths[i] の直接の依存先は edges[i] に paths のインデックスで格納される
+        - edges より後ろの paths は解析対象外の依存先（エッジを持たない）
+
+    Args:
+        direct (Dict[str, List[str]]): 相対パスでの直接の依存関係
+        root (Path): プロジェクトルート
+
+    Returns:
+        Dict[str, object]: root、paths、edges からなる結果
+    """
+    paths: List[str] = list(direct.keys())
+    index = {path: i for i, path in enumerate(paths)}
+
+    edges: List[List[int]] = []
+    for deps in direct.values():
+        targets = []
+        for dep in deps:
+            if dep not in index:
+                index[dep] = len(paths)
+                paths.append(dep)
+            targets.append(index[dep])
+        edges.append(targets)
+
+    return {"root": str(root.absolute()), "paths": paths, "edges": edges}
@@ -0,0 +1,342 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from .graph_cache import GraphCache, diff_graphs
+from .output import (
+    OUTPUT_MODES,
+    build_edge_table,
+    direct_dependencies,
+    relativize_dependencies,
+)
+from .source_analyzer import SharedParses, SourceAnalyzer
+from .traversal import DependencyTraversal
+from .utils.rwlock import ReadWriteLock
+
+T = TypeVar("T")
+
+
+class RelationService:
+    """プロジェクトのグラフとキャッシュを保持して依存関係のクエリに応答するサービス
+
+    基準ディレクトリごとにアナライザーを保持し、変更のないファイルは再解析しない。
+    グラフが最新で追加の解析が不要なクエリは読み取りロックで並行に処理し、
+    解析を伴うクエリは書き込みロックで直列化する。
+
+    Attributes:
+        parse_workers (int): ファイル解析の並列数
+        max_projects (int): 保持するアナライザーの最大数
+        graph_cache (GraphCache): 解析対象ごとのバージョン付きグラフ
+    """
+
+    # 外部（デーモン経由）から呼び出せるメソッド
+    METHODS = ("get_source_relation", "get_source_relations")
+
+    def __init__(self, parse_workers: int = 1, max_projects: int = 32):
+        self.parse_workers = parse_workers
+        self.max_projects = max(1, max_projects)
+        self.graph_cache = GraphCache()
+        self._projects: "OrderedDict[str, Tuple[SourceAnalyzer, ReadWriteLock]]" = (
+            OrderedDict()
+        )
+        self._projects_lock = threading.Lock()
+
+    def _get_project(self, base_dir: str) -> Tuple[SourceAnalyzer, ReadWriteLock]:
+        """基準ディレクトリのアナライザーとロックを取得する（なければ作成）"""
+        key = self._project_key(base_dir)
+        with self._projects_lock:
+            project = self._projects.get(key)
+            if project is None:
+                project = (SourceAnalyzer(base_dir), ReadWriteLock())
+                self._projects[key] = project
+                while len(self._projects) > self.max_projects:
+                    evicted_key, _ = self._projects.popitem(last=False)
+                    # 破棄したアナライザーのグラフの履歴も破棄する
+                    self.graph_cache.discard_group(evicted_key)
+            else:
+                self._projects.move_to_end(key)
+            return project
+
+    @staticmethod
+    def _project_key(base_dir: str) -> str:
+        """基準ディレクトリからアナライザーを識別するキーを作成する"""
+        return str(Path(base_dir).absolute())
+
+    def _query(
+        self,
+        base_dir: str,
+        is_covered: Callable[[SourceAnalyzer], bool],
+        compute: Callable[[SourceAnalyzer, bool], T],
+    ) -> T:
+        """グラフの状態に応じて読み取りまたは書き込みロックでクエリを実行する
+
+        Args:
+            base_dir (str): アナライザーの基準ディレクトリ
+            is_covered (Callable[[SourceAnalyzer], bool]): 追加の解析が不要かを判定する関数
+            compute (Callable[[SourceAnalyzer, bool], T]): 結果を計算する関数。
+                第2引数がFalseの場合は読み取りロック下で呼ばれるため、グラフを
+                変更してはならない
+
+        Returns:
+            T: 計算結果
+        """
+        analyzer, lock = self._get_project(base_dir)
+        with lock.read():
+            if analyzer.is_fresh() and is_covered(analyzer):
+                return compute(analyzer, False)
+
+        with lock.write():
+            analyzer.refresh()
+            return compute(analyzer, True)
+
+    def _traversal(
+        self, analyzer: SourceAnalyzer, shared: Optional[SharedParses] = None
+    ) -> DependencyTraversal:
+        """アナライザーの走査エンジンを作成する"""
+        return DependencyTraversal(
+            analyzer, max_workers=self.parse_workers, shared=shared
+        )
+
+    def _closure_targets(self, analyzer: SourceAnalyzer, files: List[str]) -> List[str]:
+        """closure_for に指定されたパスを正規化する（相対パスはプロジェクトルート基準）"""
+        return [
+            analyzer.normalize_path(
+                Path(os.path.normpath(analyzer.project_root / file))
+            )
+            for file in files
+        ]
+
+    def _compute_closures(
+        self,
+        analyzer: SourceAnalyzer,
+        files: List[str],
+        relative: bool,
+        writable: bool = True,
+    ) -> Dict[str, List[str]]:
+        """指定されたファイルの再帰的な依存関係のみを計算する
+
+        Args:
+            analyzer (SourceAnalyzer): 解析を行うアナライザーインスタンス
+            files (List[str]): 対象ファイルのパス（相対パスはプロジェクトルート基準）
+            relative (bool): 結果をプロジェクトルートからの相対パスにするか
+            writable (bool): 未解析のファイルを解析してよいか
+
+        Returns:
+            Dict[str, List[str]]: ファイルごとの完全な依存関係
+        """
+        traversal = self._traversal(analyzer)
+        closures: Dict[str, List[str]] = {}
+        for file_path in self._closure_targets(analyzer, files):
+            # グラフに含まれていない場合は到達可能なファイルを解析する
+            if writable and file_path not in analyzer.dependencies:
+                traversal.traverse(file_path)
+            closures[file_path] = analyzer.get_recursive_dependencies(file_path)
+
+        if relative:
+            return relativize_dependencies(closures, analyzer.project_root)
+        return closures
+
+    def _build_versioned_result(
+        self,
+        key: str,
+        dependencies: Dict[str, List[str]],
+        since: Optional[str] = None,
+        payload: Optional[Dict[str, object]] = None,
+        group: Optional[str] = None,
+    ) -> Dict[str, object]:
+        """グラフのバージョンを付与し、必要に応じて差分の結果を作成する
+
+        Args:
+            key (str): グラフを識別するキー
+            dependencies (Dict[str, List[str]]): 最新の依存関係
+            since (Optional[str]): クライアントが保持しているバージョン
+            payload (Optional[Dict[str, object]]): 全体を返す場合の結果。
+                省略時は dependencies をそのまま返す
+            group (Optional[str]): グラフが属するアナライザーのキー
+
+        Returns:
+            Dict[str, object]: 全体の依存関係、差分、または未変更を示す結果
+        """
+        version = self.graph_cache.update(key, dependencies, group)
+        if since is not None:
+            if since == version:
+                return {"version": version, "not_modified": True}
+
+            previous = self.graph_cache.get(key, since)
+            if previous is not None:
+                return {
+                    "version": version,
+                    "since": since,
+                    "delta": diff_graphs(previous, dependencies),
+                }
+
+        # 基準のバージョンが保持されていない場合は全体を返す
+        if payload is None:
+            payload = {"dependencies": dependencies}
+        return {"version": version, **payload}
+
+    def get_source_relation(
+        self,
+        path: str,
+        since: Optional[str] = None,
+        mode: str = "closure",
+        relative: bool = False,
+        closure_for: Optional[List[str]] = None,
+    ) -> Dict[str, object]:
+        """ファイルまたはディレクトリの依存関係を解析する
+
+        Args:
+            path (str): 解析対象のファイルまたはディレクトリのパス
+            since (Optional[str]): クライアントが保持しているバージョン
+            mode (str): 出力モード（closure または direct）
+            relative (bool): closure モードでプロジェクトルートからの相対パスにするか
+            closure_for (Optional[List[str]]): 再帰的な依存関係を計算するファイル
+
+        Returns:
+            Dict[str, object]: 解析結果
+        """
+        if mode not in OUTPUT_MODES:
+            raise ValueError(f"Unknown mode: {mode} (expected one of {OUTPUT_MODES})")
+
+        path_obj = Path(path)
+        is_file = path_obj.is_file()
+        base_dir = str(path_obj.parent if is_file else path_obj)
+        file_path = str(path_obj.absolute())
+        relative = relative or mode == "direct"
+
+        def is_covered(analyzer: SourceAnalyzer) -> bool:
+            if is_file:
+                covered = analyzer.covers_file(file_path)
+            else:
+                covered = analyzer.covers_directory()
+            return covered and all(
+                analyzer.covers_file(target)
+                for target in self._closure_targets(analyzer, closure_for or [])
+            )
+
+        def compute(analyzer: SourceAnalyzer, writable: bool) -> Dict[str, object]:
+            root = analyzer.project_root
+            payload: Optional[Dict[str, object]] = None
+
+            # ソースコードを解析
+            if mode == "direct":
+                if is_file:
+                    files = self._traversal(analyzer).traverse(file_path, writable)
+                else:
+                    files = analyzer.collect_directory_files()
+                dependencies = direct_dependencies(files, analyzer.dependencies, root)
+                payload = build_edge_table(dependencies, root)
+            else:
+                if is_file:
+                    dependencies = self._traversal(analyzer).analyze(
+                        file_path, writable
+                    )
+                else:
+                    dependencies = analyzer.analyze_directory()
+                if relative:
+                    dependencies = relativize_dependencies(dependencies, root)
+                    payload = {
+                        "root": str(root.absolute()),
+                        "dependencies": dependencies,
+                    }
+
+            # 結果をまとめる
+            key = json.dumps([file_path, mode, relative])
+            result = self._build_versioned_result(
+                key, dependencies, since, payload, self._project_key(base_dir)
+            )
+            if closure_for:
+                result["closures"] = self._compute_closures(
+                    analyzer, closure_for, relative, writable
+                )
+            return result
+
+        return self._query(base_dir, is_covered, compute)
+
+    def get_source_relations(self, paths: List[str]) -> Dict[str, object]:
+        """複数のファイル・ディレクトリをまとめて解析する
+
+        Notes:
+            - インポートの解決結果を単独のクエリと一致させるため、対象は
+              get_source_relation と同じ基準ディレクトリごとにまとめ、
+              同じ基準ディレクトリの対象で1つのグラフを共有する
+            - 基準ディレクトリが異なっても、解決設定（tsconfig.json のエイリアス、
+              検索パス）が同じファイルの解析結果はバッチ内で共有する。
+              Python・Rubyの検索パスは基準ディレクトリを含むため、異なる
+              ディレクトリの対象の間では共有されない
+
+        Args:
+            paths (List[str]): 解析対象のファイルまたはディレクトリのパスのリスト
+
+        Returns:
+            Dict[str, object]: 対象パスごとの依存関係
+        """
+        groups: Dict[str, List[str]] = {}
+        for path in paths:
+            path_obj = Path(path)
+            base_dir = str(path_obj.parent if path_obj.is_file() else path_obj)
+            groups.setdefault(str(Path(base_dir).absolute()), []).append(path)
+
+        shared = SharedParses()
+        grouped_results: Dict[str, Dict[str, Dict[str, List[str]]]] = {}
+        for base_dir, group in groups.items():
+            grouped_results.update(self._analyze_group(base_dir, group, shared))
+
+        return {"results": {path: grouped_results[path] for path in paths}}
+
+    def _analyze_group(
+        self,
+        base_dir: str,
+        paths: List[str],
+        shared: Optional[SharedParses] = None,
+    ) -> Dict[str, Dict[str, Dict[str, List[str]]]]:
+        """同じ基準ディレクトリの対象を1つの共有グラフで解析する
+
+        Args:
+            base_dir (str): 対象に共通する基準ディレクトリ
+            paths (List[str]): 解析対象のファイルまたはディレクトリのパスのリスト
+            shared (Optional[SharedParses]): 他の基準ディレクトリと共有する解析結果
+
+        Returns:
+            Dict[str, Dict[str, Dict[str, List[str]]]]: 対象パスごとの依存関係
+        """
+        file_targets = {
+            path: str(Path(path).absolute()) for path in paths if Path(path).is_file()
+        }
+
+        def is_covered(analyzer: SourceAnalyzer) -> bool:
+            return all(
+                analyzer.covers_file(file_targets[path])
+                if path in file_targets
+                else analyzer.covers_directory()
+                for path in paths
+            )
+
+        def compute(
+            analyzer: SourceAnalyzer, writable: bool
+        ) -> Dict[str, Dict[str, Dict[str, List[str]]]]:
+            # 到達可能なファイルの和集合を一度だけ解析
+            traversal = self._traversal(analyzer, shared)
+            reachable_files = {
+                path: traversal.traverse(file_path, writable)
+                for path, file_path in file_targets.items()
+            }
+
+            results: Dict[str, Dict[str, Dict[str, List[str]]]] = {}
+            for path in paths:
+                if path in reachable_files:
+                    # 再帰的な依存関係は共有グラフ上でキャッシュされる
+                    dependencies = {
+                        file_path: analyzer.get_recursive_dependencies(file_path)
+                        for file_path in reachable_files[path]
+                    }
+                else:
+                    dependencies = analyzer.analyze_directory(shared=shared)
+                results[path] = {"dependencies": dependencies}
+
+            return results
+
+        return self._query(base_dir, is_covered, compute)
@@ -1,10 +1,89 @@
+import os
+import threading
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from .analyzers.python import PythonAnalyzer
 from .analyzers.ruby import RubyAnalyzer
 from .analyzers.rust import RustAnalyzer
 from .analyzers.typescript import TypeScriptAnalyzer
+from .utils.path import (
+    find_project_root,
+    nearest_existing_dir,
+    record_missing_paths,
+)
+
+
+# 解析対象のファイルを探索しないディレクトリ（VCS、依存パッケージ、キャッシュ）
+IGNORED_DIRS = frozenset(
+    {
+        ".git",
+        ".hg",
+        ".svn",
+        "node_modules",
+        ".venv",
+        "venv",
+        "__pycache__",
+        ".mypy_cache",
+        ".pytest_cache",
+        ".ruff_cache",
+        ".tox",
+        ".nox",
+    }
+)
+
+
+def _get_mtime(path: str) -> Optional[float]:
+    """ファイルまたはディレクトリの更新時刻を取得する（存在しない場合はNone）"""
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class SharedParses:
+    """解決設定が同じアナライザーの間でファイルの解析結果を共有するキャッシュ
+
+    インポートの解決結果はファイルの内容と解決設定（tsconfig.json のエイリアス、
+    検索パスなど）で決まるため、基準ディレクトリが異なっても解決設定が同じ
+    アナライザーは同じファイルの解析結果を再利用できる。
+    """
+
+    def __init__(self) -> None:
+        self._results: Dict[
+            Tuple[Tuple[str, ...], str], Tuple[Optional[Set[str]], Set[str]]
+        ] = {}
+        self._lock = threading.Lock()
+
+    def parse(
+        self,
+        analyzer: "SourceAnalyzer",
+        file_path: Path,
+        watch_dirs: Optional[Set[str]] = None,
+    ) -> Optional[Set[str]]:
+        """ファイルを解析する（同じ解決設定で解析済みの場合は結果を再利用）
+
+        Args:
+            analyzer (SourceAnalyzer): 解析を行うアナライザー
+            file_path (Path): 解析対象のファイルパス
+            watch_dirs (Optional[Set[str]]): 変更を監視すべきディレクトリの追加先
+
+        Returns:
+            Optional[Set[str]]: SourceAnalyzer.try_parse_file と同じ結果
+        """
+        key = (analyzer.resolution_key(file_path), analyzer.normalize_path(file_path))
+        with self._lock:
+            result = self._results.get(key)
+        if result is None:
+            parsed_dirs: Set[str] = set()
+            result = (analyzer.try_parse_file(file_path, parsed_dirs), parsed_dirs)
+            with self._lock:
+                result = self._results.setdefault(key, result)
+
+        imports, parsed_dirs = result
+        if watch_dirs is not None:
+            watch_dirs.update(parsed_dirs)
+        return None if imports is None else set(imports)
 
 
 class SourceAnalyzer:
@@ -12,11 +91,25 @@ class SourceAnalyzer:
 
     def __init__(self, base_dir: str):
         self.base_dir = Path(base_dir)
+        self.config_file = self.base_dir / "tsconfig.json"
+        self.reset()
+
+    def reset(self) -> None:
+        """依存関係グラフを破棄し、設定を読み込み直す"""
         self.src_dir = (
             self.base_dir / "src" if (self.base_dir / "src").exists() else self.base_dir
         )
+        # 相対パスでの出力の基準（tsconfig.json や .git などを含む最も近い祖先）
+        self.project_root = find_project_root(self.base_dir)
         self.dependencies: Dict[str, Set[str]] = {}
-        self._analyzed_files: Set[str] = set()
+        self._closure_cache: Dict[str, List[str]] = {}
+        self._closure_sets: Dict[str, Set[str]] = {}
+        # 解析時点の更新時刻（変更検知用）
+        self._file_mtimes: Dict[str, Optional[float]] = {}
+        self._dir_mtimes: Dict[str, Optional[float]] = {}
+        # 解析済みのディレクトリとその時点で収集したファイル
+        self._collected_dirs: Dict[str, List[str]] = {}
+        self._config_mtime = _get_mtime(str(self.config_file))
 
         # 各言語のアナライザーを初期化
         self.analyzers = [
@@ -40,66 +133,310 @@ class SourceAnalyzer:
         except ValueError:
             return str(path)
 
-    def analyze_file(self, file_path: Path) -> None:
-        """ファイルを解析する
+    def resolution_key(self, file_path: Path) -> Tuple[str, ...]:
+        """ファイルのインポートの解決設定を表すキーを返す
 
         Args:
-            file_path (Path): 解析対象のファイルパス
+            file_path (Path): 対象のファイルパス
+
+        Returns:
+            Tuple[str, ...]: 対応する言語のアナライザーの解決設定（SharedParses を参照）
         """
-        if not file_path.is_file():
-            return
+        for analyzer in self.analyzers:
+            if analyzer.supports_file(file_path):
+                return analyzer.resolution_key()
+        return ()
 
-        normalized_path = self.normalize_path(file_path)
-        self.dependencies[normalized_path] = set()
+    def parse_file(
+        self, file_path: Path, watch_dirs: Optional[Set[str]] = None
+    ) -> Set[str]:
+        """ファイルのインポートを解析する（グラフは更新しない）
+
+        Notes:
+            - 依存関係グラフを変更しないため、複数スレッドから並列に呼び出せる
+            - 解決できなかったインポートの候補（拡張子の補完、tsconfig.json の
+              エイリアス先、検索パスなど）が後から作成されると解決結果が変わるため、
+              候補の最も近い既存のディレクトリを watch_dirs に追加する
 
+        Args:
+            file_path (Path): 解析対象のファイルパス
+            watch_dirs (Optional[Set[str]]): 変更を監視すべきディレクトリの追加先
+
+        Returns:
+            Set[str]: インポートされているファイルパスの集合
+        """
         # ファイルの内容を読み込む
         content = file_path.read_text(encoding="utf-8")
 
         # 適切なアナライザーを見つけて解析を実行
-        for analyzer in self.analyzers:
-            if analyzer.supports_file(file_path):
-                imports = analyzer.analyze_imports(content, file_path)
-                self.dependencies[normalized_path].update(imports)
-                break
+        imports: Set[str] = set()
+        missing: Set[Path] = set()
+        with record_missing_paths(missing):
+            for analyzer in self.analyzers:
+                if analyzer.supports_file(file_path):
+                    imports = analyzer.analyze_imports(content, file_path)
+                    break
+
+        if watch_dirs is not None:
+            watch_dirs.update(
+                str(nearest_existing_dir(parent))
+                for parent in {path.parent for path in missing}
+            )
+        return imports
+
+    def try_parse_file(
+        self,
+        file_path: Path,
+        watch_dirs: Optional[Set[str]] = None,
+        shared: Optional[SharedParses] = None,
+    ) -> Optional[Set[str]]:
+        """ファイルを解析する（グラフは更新しない）
+
+        Notes:
+            - ファイル単位とディレクトリ単位の解析で共通の方針として、読み込みや
+              構文解析に失敗したファイルは依存関係を持たないファイルとして扱う
+
+        Args:
+            file_path (Path): 解析対象のファイルパス
+            watch_dirs (Optional[Set[str]]): 変更を監視すべきディレクトリの追加先
+            shared (Optional[SharedParses]): 他のアナライザーと共有する解析結果
+
+        Returns:
+            Optional[Set[str]]: インポートされているファイルパスの集合。
+                ファイルが存在しない場合はNone
+        """
+        if shared is not None:
+            return shared.parse(self, file_path, watch_dirs)
+        if not file_path.is_file():
+            return None
+        try:
+            return self.parse_file(file_path, watch_dirs)
+        except Exception:
+            return set()
+
+    def set_file_dependencies(
+        self,
+        normalized_path: str,
+        imports: Set[str],
+        watch_dirs: Iterable[str] = (),
+    ) -> None:
+        """ファイルの直接の依存関係をグラフに登録する
+
+        Args:
+            normalized_path (str): 正規化されたファイルパス
+            imports (Set[str]): インポートされているファイルパスの集合
+            watch_dirs (Iterable[str]): 未解決のインポートの解決結果を変えうる
+                ディレクトリ（parse_file を参照）
+        """
+        self.dependencies[normalized_path] = set(imports)
+        self._file_mtimes[normalized_path] = _get_mtime(normalized_path)
+        self._track_directory(os.path.dirname(normalized_path))
+        for directory in watch_dirs:
+            self._track_directory(directory)
+        # グラフが変わるため再帰的な依存関係のキャッシュを破棄
+        self._clear_closures()
+
+    def _clear_closures(self) -> None:
+        """再帰的な依存関係のキャッシュを破棄する"""
+        self._closure_cache.clear()
+        self._closure_sets.clear()
+
+    def _track_directory(self, directory: str) -> None:
+        """ファイルの追加・削除を検知するためにディレクトリの更新時刻を記録する"""
+        if directory not in self._dir_mtimes:
+            self._dir_mtimes[directory] = _get_mtime(directory)
+
+    def _is_structure_changed(self) -> bool:
+        """設定ファイルやディレクトリ構成が解析時点から変化したかを判定する"""
+        if _get_mtime(str(self.config_file)) != self._config_mtime:
+            return True
+        return any(
+            _get_mtime(directory) != mtime
+            for directory, mtime in self._dir_mtimes.items()
+        )
+
+    def _stale_files(self) -> List[str]:
+        """解析時点から内容が変更されたファイルを列挙する"""
+        return [
+            path
+            for path, mtime in self._file_mtimes.items()
+            if _get_mtime(path) != mtime
+        ]
+
+    def is_fresh(self) -> bool:
+        """グラフが現在のファイルシステムの状態と一致しているかを判定する
+
+        Returns:
+            bool: 解析以降に変更がない場合はTrue
+        """
+        return not self._is_structure_changed() and not self._stale_files()
+
+    def refresh(self) -> None:
+        """解析以降の変更をグラフに反映する
+
+        Notes:
+            - 内容が変更されたファイルはグラフから除外し、次回の解析時に再解析する
+            - ファイルの追加・削除や tsconfig.json の変更は未解決のインポートの解決結果を
+              変えうるため、グラフ全体を破棄する
+        """
+        if self._is_structure_changed():
+            self.reset()
+            return
+
+        stale_files = self._stale_files()
+        for path in stale_files:
+            del self.dependencies[path]
+            del self._file_mtimes[path]
+        if stale_files:
+            self._clear_closures()
+
+    def covers_file(self, file_path: str) -> bool:
+        """ファイルから到達可能なファイルがすべて解析済みかを判定する
+
+        Args:
+            file_path (str): 起点となるファイルの正規化されたパス
+
+        Returns:
+            bool: 追加の解析が不要な場合はTrue
+        """
+        visited: Set[str] = set()
+        pending = [file_path]
+        while pending:
+            current = pending.pop()
+            if current in visited:
+                continue
+            visited.add(current)
+            if current not in self.dependencies:
+                # 存在しないファイルは解析対象にならない
+                if Path(current).is_file():
+                    return False
+                continue
+            pending.extend(self.dependencies[current])
+        return True
+
+    def covers_directory(self, directory: Optional[Path] = None) -> bool:
+        """ディレクトリ内のファイルがすべて解析済みかを判定する
+
+        Args:
+            directory (Optional[Path]): 対象のディレクトリ。省略時はsrc_dir
+
+        Returns:
+            bool: 追加の解析が不要な場合はTrue
+        """
+        target_dir = directory if directory is not None else self.src_dir
+        collected_files = self._collected_dirs.get(self.normalize_path(target_dir))
+        if collected_files is None:
+            return False
+        # 変更により除外されたファイルがあれば再解析が必要
+        return all(path in self.dependencies for path in collected_files)
+
+    def analyze_file(self, file_path: Path) -> None:
+        """ファイルを解析する
+
+        Args:
+            file_path (Path): 解析対象のファイルパス
+
+        Raises:
+            Exception: 読み込みや構文解析に失敗した場合（グラフには登録しない）
+        """
+        if not file_path.is_file():
+            return
+
+        watch_dirs: Set[str] = set()
+        imports = self.parse_file(file_path, watch_dirs)
+        self.set_file_dependencies(self.normalize_path(file_path), imports, watch_dirs)
 
     def get_recursive_dependencies(self, file_path: str) -> List[str]:
         """指定されたファイルの再帰的な依存関係を取得する
 
+        Notes:
+            - 結果はグラフが更新されるまでキャッシュされ、複数の対象で共有される
+
         Args:
             file_path (str): 分析対象のファイルパス
 
         Returns:
-            List[str]: 再帰的に解決された依存関係のリスト
+            List[str]: 再帰的に解決された依存関係のリスト（ソート済み）
         """
-        self._analyzed_files.clear()
-        return self._analyze_dependencies(file_path)
+        closure = self._closure_cache.get(file_path)
+        if closure is None:
+            if file_path not in self._closure_sets:
+                self._analyze_dependencies(file_path)
+            closure = sorted(self._closure_sets[file_path])
+            self._closure_cache[file_path] = closure
+        return list(closure)
 
-    def _analyze_dependencies(self, file_path: str) -> List[str]:
-        """再帰的に依存関係を分析する内部メソッド
+    def _analyze_dependencies(self, file_path: str) -> None:
+        """強連結成分ごとに到達可能なファイルの集合を計算する内部メソッド
+
+        Notes:
+            - Tarjanのアルゴリズムを反復的に実行するため、長い依存の連鎖でも
+              再帰の上限に達しない
+            - 同じ強連結成分のファイルは同じ集合を共有し、計算済みの依存先の
+              集合は再利用する
+            - 計算結果は最後にまとめて登録するため、読み取りロック下で並行に
+              呼び出しても未完成の集合が参照されることはない
 
         Args:
             file_path (str): 分析対象のファイルパス
-
-        Returns:
-            List[str]: 依存関係のリスト
         """
-        if file_path in self._analyzed_files:
-            return []
+        computed: Dict[str, Set[str]] = {}
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        stack: List[str] = []
+        on_stack: Set[str] = set()
+        work: List[Tuple[str, Iterator[str]]] = []
+
+        def is_computed(path: str) -> bool:
+            return path in computed or path in self._closure_sets
+
+        def visit(path: str) -> None:
+            index[path] = lowlink[path] = len(index)
+            stack.append(path)
+            on_stack.add(path)
+            work.append((path, iter(self.dependencies.get(path, ()))))
+
+        visit(file_path)
+        while work:
+            current, successors = work[-1]
+            for successor in successors:
+                if is_computed(successor):
+                    continue
+                if successor not in index:
+                    visit(successor)
+                    break
+                if successor in on_stack:
+                    lowlink[current] = min(lowlink[current], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[current])
+                if lowlink[current] != index[current]:
+                    continue
 
-        self._analyzed_files.add(file_path)
-        all_dependencies = []
+                # 強連結成分を取り出し、依存先の集合を統合する
+                component: List[str] = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == current:
+                        break
 
-        direct_dependencies = list(self.dependencies.get(file_path, set()))
-        for dependency in direct_dependencies:
-            if dependency not in all_dependencies:
-                all_dependencies.append(dependency)
-                # 依存先の依存関係を再帰的に取得
-                nested_dependencies = self._analyze_dependencies(dependency)
-                for nested_dep in nested_dependencies:
-                    if nested_dep not in all_dependencies:
-                        all_dependencies.append(nested_dep)
+                closure: Set[str] = set()
+                for member in component:
+                    for dependency in self.dependencies.get(member, ()):
+                        closure.add(dependency)
+                        known = computed.get(dependency)
+                        if known is None:
+                            known = self._closure_sets.get(dependency)
+                        if known is not None:
+                            closure |= known
+                for member in component:
+                    computed[member] = closure
 
-        return all_dependencies
+        self._closure_sets.update(computed)
 
     def analyze_single_file(self, file_path: Path) -> Dict[str, List[str]]:
         """単一のファイルを解析する
@@ -114,29 +451,105 @@ class SourceAnalyzer:
         normalized_path = self.normalize_path(file_path)
         return {normalized_path: self.get_recursive_dependencies(normalized_path)}
 
-    def analyze_directory(self) -> Dict[str, List[str]]:
-        """ディレクトリ全体を解析する
+    def _walk_source_dirs(self, target_dir: Path) -> Iterator[Tuple[str, List[Path]]]:
+        """ディレクトリを一度だけ走査し、ディレクトリごとに解析対象ファイルを返す
 
-        Returns:
-            Dict[str, List[str]]: ディレクトリ内のファイルの完全な依存関係
+        Notes:
+            - IGNORED_DIRS のディレクトリとシンボリックリンクのディレクトリは辿らない
+
+        Args:
+            target_dir (Path): 走査するディレクトリ
+
+        Yields:
+            Tuple[str, List[Path]]: ディレクトリのパスとその直下の解析対象ファイル
         """
         # すべてのアナライザーの対象拡張子を収集
-        all_extensions = []
-        for analyzer in self.analyzers:
-            all_extensions.extend(analyzer.file_extensions)
+        all_extensions = tuple(
+            ext for analyzer in self.analyzers for ext in analyzer.file_extensions
+        )
 
+        for dir_path, dir_names, file_names in os.walk(target_dir):
+            dir_names[:] = sorted(
+                name for name in dir_names if name not in IGNORED_DIRS
+            )
+            yield (
+                dir_path,
+                [
+                    Path(dir_path) / name
+                    for name in sorted(file_names)
+                    if name.endswith(all_extensions)
+                ],
+            )
+
+    def iter_source_files(self, directory: Optional[Path] = None) -> Iterator[Path]:
+        """ディレクトリ内の解析対象ファイルを順に返す
+
+        Args:
+            directory (Optional[Path]): 対象のディレクトリ。省略時はsrc_dir
+
+        Yields:
+            Path: 解析対象のファイルパス
+        """
         # ファイルを収集（srcディレクトリが存在する場合はそこから、存在しない場合はbase_dirから）
-        target_files = []
-        for ext in all_extensions:
-            target_files.extend(self.src_dir.rglob(f"*{ext}"))
+        target_dir = directory if directory is not None else self.src_dir
+        for _, source_files in self._walk_source_dirs(target_dir):
+            yield from source_files
+
+    def collect_directory_files(
+        self, directory: Optional[Path] = None, shared: Optional[SharedParses] = None
+    ) -> List[str]:
+        """ディレクトリ内のファイルを解析し、再帰的な依存関係は計算せずに列挙する
 
-        # ファイルを解析
+        Args:
+            directory (Optional[Path]): 解析対象のディレクトリ。省略時はsrc_dir
+            shared (Optional[SharedParses]): 他のアナライザーと共有する解析結果
+
+        Returns:
+            List[str]: 解析されたファイルの正規化されたパスのリスト
+        """
+        target_dir = directory if directory is not None else self.src_dir
+        if self.covers_directory(target_dir):
+            # グラフを変更せずに前回の収集結果を返す（読み取りロック下でも安全）
+            return list(self._collected_dirs[self.normalize_path(target_dir)])
+
+        # 新しいサブディレクトリやファイルの追加を検知できるよう、走査したディレクトリを記録
+        target_files: List[Path] = []
+        for dir_path, source_files in self._walk_source_dirs(target_dir):
+            self._track_directory(self.normalize_path(Path(dir_path)))
+            target_files.extend(source_files)
+
+        # ファイルを解析（解析済みのファイルは共有グラフの結果を再利用）
+        collected_files = []
         for file_path in target_files:
-            self.analyze_file(file_path)
+            normalized_path = self.normalize_path(file_path)
+            if normalized_path not in self.dependencies:
+                watch_dirs: Set[str] = set()
+                imports = self.try_parse_file(file_path, watch_dirs, shared)
+                if imports is None:
+                    continue
+                self.set_file_dependencies(normalized_path, imports, watch_dirs)
+            collected_files.append(normalized_path)
+
+        self._collected_dirs[self.normalize_path(target_dir)] = collected_files
+        return list(collected_files)
+
+    def analyze_directory(
+        self, directory: Optional[Path] = None, shared: Optional[SharedParses] = None
+    ) -> Dict[str, List[str]]:
+        """ディレクトリ全体を解析する
+
+        Args:
+            directory (Optional[Path]): 解析対象のディレクトリ。省略時はsrc_dir
+            shared (Optional[SharedParses]): 他のアナライザーと共有する解析結果
+
+        Returns:
+            Dict[str, List[str]]: ディレクトリ内のファイルの完全な依存関係
+        """
+        target_files = self.collect_directory_files(directory, shared)
 
         # 各ファイルの再帰的な依存関係を取得
         complete_dependencies = {}
-        for file_path in self.dependencies.keys():
+        for file_path in target_files:
             complete_dependencies[file_path] = self.get_recursive_dependencies(
                 file_path
             )
@@ -0,0 +1,409 @@
+import json
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+from .source_analyzer import SourceAnalyzer
+from .traversal import DependencyTraversal
+from .utils.path import ensure_private_dir
+
+# メモリ上限の既定値（MB）
+DEFAULT_MEMORY_LIMIT_MB = 64
+
+# 一度に解析・書き込みするファイル数
+BATCH_SIZE = 256
+
+# 解析結果の書き出し先ディレクトリを指定する環境変数
+EXPORT_DIR_ENV = "SOURCE_RELATION_EXPORT_DIR"
+
+# files.state の値（未解析、解析済み、存在しないまたは解析対象外）
+_PENDING = 0
+_PARSED = 1
+_SKIPPED = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    state INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS files_state ON files (state, id);
+CREATE TABLE IF NOT EXISTS edges (
+    src INTEGER NOT NULL,
+    dst INTEGER NOT NULL,
+    PRIMARY KEY (src, dst)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS edges_dst ON edges (dst, src);
+"""
+
+_CLOSURE_QUERY = """
+WITH RECURSIVE closure(id) AS (
+    SELECT dst FROM edges WHERE src = ?
+    UNION
+    SELECT edges.dst FROM edges JOIN closure ON edges.src = closure.id
+)
+SELECT files.path FROM closure JOIN files ON files.id = closure.id
+"""
+
+_DEPENDENTS_QUERY = """
+WITH RECURSIVE dependents(id) AS (
+    SELECT src FROM edges WHERE dst = ?
+    UNION
+    SELECT edges.src FROM edges JOIN dependents ON edges.dst = dependents.id
+)
+SELECT files.path FROM dependents JOIN files ON files.id = dependents.id
+"""
+
+
+class SpillGraphStore:
+    """依存関係グラフをSQLiteに逐次書き込み、メモリ使用量を抑えて問い合わせるストア
+
+    解析したファイルのエッジは解析のたびにディスクへ書き出され、未解析ファイルの
+    ワークリストもデータベース上で管理する。再帰的な依存関係や逆依存はSQLiteの
+    再帰クエリで計算し、ページキャッシュと一時データはメモリ上限を超えると
+    ディスクに退避される。
+
+    Attributes:
+        db_path (str): データベースファイルのパス
+        memory_limit_mb (int): SQLiteが使用するメモリの上限（MB）
+    """
+
+    def __init__(self, db_path: str, memory_limit_mb: int = DEFAULT_MEMORY_LIMIT_MB):
+        self.db_path = db_path
+        self.memory_limit_mb = max(1, memory_limit_mb)
+        self._connection = sqlite3.connect(db_path)
+
+        memory_limit = self.memory_limit_mb * 1024 * 1024
+        self._connection.executescript(
+            f"""
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            PRAGMA temp_store = FILE;
+            PRAGMA mmap_size = 0;
+            PRAGMA cache_size = -{memory_limit // 1024 // 2};
+            PRAGMA soft_heap_limit = {memory_limit};
+            """
+        )
+        self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """データベースとの接続を閉じる"""
+        self._connection.close()
+
+    def clear(self) -> None:
+        """保存されているグラフを破棄する"""
+        with self._connection:
+            self._connection.execute("DELETE FROM edges")
+            self._connection.execute("DELETE FROM files")
+
+    def _intern(self, path: str) -> int:
+        """パスのIDを取得する（未登録の場合は未解析として登録）"""
+        self._connection.execute(
+            "INSERT OR IGNORE INTO files (path) VALUES (?)", (path,)
+        )
+        row = self._connection.execute(
+            "SELECT id FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        return row[0]
+
+    def add_pending(self, paths: Iterable[str]) -> None:
+        """未解析のファイルとしてワークリストに登録する
+
+        Args:
+            paths (Iterable[str]): 正規化されたファイルパス
+        """
+        with self._connection:
+            for path in paths:
+                self._intern(path)
+
+    def pending(self, limit: int) -> List[str]:
+        """未解析のファイルを登録順に取得する
+
+        Args:
+            limit (int): 取得する最大件数
+
+        Returns:
+            List[str]: 未解析のファイルパスのリスト
+        """
+        rows = self._connection.execute(
+            "SELECT path FROM files WHERE state = ? ORDER BY id LIMIT ?",
+            (_PENDING, limit),
+        )
+        return [row[0] for row in rows]
+
+    def add_files(
+        self, parsed: Iterable[Tuple[str, Optional[Set[str]]]], follow: bool
+    ) -> None:
+        """解析したファイルの直接の依存関係を書き込む
+
+        Args:
+            parsed (Iterable[Tuple[str, Optional[Set[str]]]]): ファイルパスと
+                インポートの集合の組。ファイルが存在しない場合はNone
+            follow (bool): 依存先を未解析のファイルとしてワークリストに登録するか
+        """
+        with self._connection:
+            for path, imports in parsed:
+                file_id = self._intern(path)
+                if imports is None:
+                    self._connection.execute(
+                        "UPDATE files SET state = ? WHERE id = ?", (_SKIPPED, file_id)
+                    )
+                    continue
+
+                self._connection.execute(
+                    "UPDATE files SET state = ? WHERE id = ?", (_PARSED, file_id)
+                )
+                for dependency in imports:
+                    if follow:
+                        dependency_id = self._intern(dependency)
+                    else:
+                        # 依存先は解析対象外として登録し、ワークリストには加えない
+                        self._connection.execute(
+                            "INSERT OR IGNORE INTO files (path, state) VALUES (?, ?)",
+                            (dependency, _SKIPPED),
+                        )
+                        dependency_id = self._intern(dependency)
+                    self._connection.execute(
+                        "INSERT OR IGNORE INTO edges (src, dst) VALUES (?, ?)",
+                        (file_id, dependency_id),
+                    )
+
+    def files(self) -> Iterator[Tuple[int, str]]:
+        """解析済みのファイルを登録順に返す
+
+        Yields:
+            Tuple[int, str]: ファイルのIDとパス
+        """
+        cursor = self._connection.execute(
+            "SELECT id, path FROM files WHERE state = ? ORDER BY id", (_PARSED,)
+        )
+        yield from cursor
+
+    def _file_id(self, path: str) -> Optional[int]:
+        """パスのIDを取得する（未登録の場合はNone）"""
+        row = self._connection.execute(
+            "SELECT id FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def closure(self, file_id: int) -> Iterator[str]:
+        """ファイルの再帰的な依存関係を返す
+
+        Args:
+            file_id (int): ファイルのID
+
+        Yields:
+            str: 依存先のファイルパス
+        """
+        for row in self._connection.execute(_CLOSURE_QUERY, (file_id,)):
+            yield row[0]
+
+    def dependents(self, path: str) -> Iterator[str]:
+        """ファイルに再帰的に依存しているファイルを返す
+
+        Args:
+            path (str): 正規化されたファイルパス
+
+        Yields:
+            str: 依存元のファイルパス
+        """
+        file_id = self._file_id(path)
+        if file_id is None:
+            return
+        for row in self._connection.execute(_DEPENDENTS_QUERY, (file_id,)):
+            yield row[0]
+
+
+def spill_to_stream(
+    path: str,
+    out: TextIO,
+    db_path: str,
+    memory_limit_mb: int = DEFAULT_MEMORY_LIMIT_MB,
+    dependents_of: Optional[List[str]] = None,
+    parse_workers: int = 1,
+) -> int:
+    """依存関係をディスク上のストア経由で解析し、結果を逐次書き出す
+
+    Args:
+        path (str): 解析対象のファイルまたはディレクトリのパス
+        out (TextIO): 書き出し先
+        db_path (str): ストアのデータベースファイルのパス
+        memory_limit_mb (int): SQLiteが使用するメモリの上限（MB）
+        dependents_of (Optional[List[str]]): 指定した場合はこれらのファイルの
+            逆依存のみを書き出す
+        parse_workers (int): ファイル解析の並列数
+
+    Returns:
+        int: 書き出したファイル数
+    """
+    path_obj = Path(path)
+    analyzer = SourceAnalyzer(str(path_obj.parent if path_obj.is_file() else path_obj))
+    store = SpillGraphStore(db_path, memory_limit_mb)
+    try:
+        build_spilled_graph(analyzer, path, store, parse_workers)
+        if dependents_of:
+            return stream_dependents(analyzer, store, dependents_of, out)
+        return stream_dependencies(store, out)
+    finally:
+        store.close()
+
+
+def build_spilled_graph(
+    analyzer: SourceAnalyzer, path: str, store: SpillGraphStore, parse_workers: int = 1
+) -> None:
+    """ファイルまたはディレクトリを解析し、依存関係をストアに書き込む
+
+    Notes:
+        - ファイルを指定した場合は到達可能なファイルをすべて解析する
+        - ディレクトリを指定した場合はディレクトリ内のファイルのみを解析する
+        - 一度に保持するのは BATCH_SIZE 件分の解析結果のみ
+
+    Args:
+        analyzer (SourceAnalyzer): インポートの解析に使うアナライザー
+        path (str): 解析対象のファイルまたはディレクトリのパス
+        store (SpillGraphStore): 書き込み先のストア
+        parse_workers (int): ファイル解析の並列数
+    """
+    path_obj = Path(path)
+    store.clear()
+
+    # 解析処理は走査エンジンと共有し、結果はグラフに登録せずストアへ書き込む
+    parse_batch = DependencyTraversal(analyzer, parse_workers).parse_files
+
+    if path_obj.is_file():
+        # ワークリストをデータベース上で管理して到達可能なファイルを解析
+        store.add_pending([analyzer.normalize_path(path_obj)])
+        while True:
+            batch = store.pending(BATCH_SIZE)
+            if not batch:
+                break
+            store.add_files(parse_batch(batch), follow=True)
+        return
+
+    batch: List[str] = []
+    for file_path in analyzer.iter_source_files():
+        batch.append(analyzer.normalize_path(file_path))
+        if len(batch) >= BATCH_SIZE:
+            store.add_files(parse_batch(batch), follow=False)
+            batch = []
+    if batch:
+        store.add_files(parse_batch(batch), follow=False)
+
+
+def export_dir() -> Path:
+    """解析結果の書き出し先ディレクトリを用意して返す
+
+    Notes:
+        - 環境変数 SOURCE_RELATION_EXPORT_DIR が未設定の場合は、一時ディレクトリ内の
+          ユーザー専用（0700）のディレクトリを使う
+
+    Returns:
+        Path: 書き出し先ディレクトリの実体のパス
+    """
+    configured = os.environ.get(EXPORT_DIR_ENV)
+    if configured:
+        directory = Path(configured)
+        directory.mkdir(parents=True, exist_ok=True)
+    else:
+        uid = os.getuid() if hasattr(os, "getuid") else 0
+        directory = ensure_private_dir(
+            Path(tempfile.gettempdir()) / f"source-relation-{uid}-exports"
+        )
+    return directory.resolve()
+
+
+@contextmanager
+def open_export(output_path: str) -> Iterator[Tuple[Path, TextIO]]:
+    """書き出し先ディレクトリ内に新しい出力ファイルを作成する
+
+    Notes:
+        - 相対パスは書き出し先ディレクトリ基準で解釈する
+        - 既存のファイル（シンボリックリンクを含む）は上書きしない
+        - 同じディレクトリの一時ファイルに書き出し、ブロックが正常に終了した場合にのみ
+          出力ファイルとして配置する。例外で終了した場合は何も残さない
+
+    Args:
+        output_path (str): 出力ファイルのパス
+
+    Yields:
+        Tuple[Path, TextIO]: 出力ファイルのパスと書き込み用に開いた一時ファイル
+
+    Raises:
+        PermissionError: 出力先が書き出し先ディレクトリの外にある場合
+        FileExistsError: 出力ファイルがすでに存在する場合
+    """
+    directory = export_dir()
+    target = directory / output_path
+    # ファイル名以外のシンボリックリンクや .. を解決して、ディレクトリの外を指していないか確認
+    target = target.parent.resolve() / target.name
+    if directory != target.parent and directory not in target.parent.parents:
+        raise PermissionError(f"{output_path} is outside of the export directory")
+    # 解析を始める前に既存のファイルを検出する
+    if os.path.lexists(target):
+        raise FileExistsError(f"{target} already exists")
+
+    fd, temp_path = tempfile.mkstemp(
+        prefix=f".{target.name}.", suffix=".tmp", dir=target.parent
+    )
+    try:
+        with open(fd, "w", encoding="utf-8") as out:
+            yield target, out
+        # 途中で作成されたファイルも上書きしないよう、リンクの作成で配置する
+        os.link(temp_path, target)
+    finally:
+        os.unlink(temp_path)
+
+
+def _write_entry(out: TextIO, first: bool, key: str, values: Iterator[str]) -> None:
+    """JSONオブジェクトの1エントリを要素ごとに書き出す"""
+    out.write("\n" if first else ",\n")
+    out.write(f"    {json.dumps(key, ensure_ascii=False)}: [")
+    for i, value in enumerate(values):
+        if i:
+            out.write(", ")
+        out.write(json.dumps(value, ensure_ascii=False))
+    out.write("]")
+
+
+def stream_dependencies(store: SpillGraphStore, out: TextIO) -> int:
+    """すべてのファイルの再帰的な依存関係を逐次書き出す
+
+    Args:
+        store (SpillGraphStore): 依存関係を保持するストア
+        out (TextIO): 書き出し先
+
+    Returns:
+        int: 書き出したファイル数
+    """
+    out.write('{\n  "dependencies": {')
+    count = 0
+    for file_id, path in store.files():
+        _write_entry(out, count == 0, path, store.closure(file_id))
+        count += 1
+    out.write("\n  }\n}\n")
+    return count
+
+
+def stream_dependents(
+    analyzer: SourceAnalyzer, store: SpillGraphStore, files: List[str], out: TextIO
+) -> int:
+    """指定されたファイルに再帰的に依存しているファイルを逐次書き出す
+
+    Args:
+        analyzer (SourceAnalyzer): パスの正規化に使うアナライザー
+        store (SpillGraphStore): 依存関係を保持するストア
+        files (List[str]): 対象ファイルのパス（相対パスはプロジェクトルート基準）
+        out (TextIO): 書き出し先
+
+    Returns:
+        int: 書き出したファイル数
+    """
+    out.write('{\n  "dependents": {')
+    for i, file in enumerate(files):
+        file_path = analyzer.normalize_path(analyzer.base_dir / file)
+        _write_entry(out, i == 0, file_path, store.dependents(file_path))
+    out.write("\n  }\n}\n")
+    return len(files)
@@ -0,0 +1,136 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from .source_analyzer import SharedParses, SourceAnalyzer
+
+
+class DependencyTraversal:
+    """ファイルを起点とした依存関係の走査エンジン
+
+    未解析ファイルのワークリストを波（wave）単位で処理し、到達可能な各ファイルを
+    一度だけ解析する。再帰的な依存関係は走査の完了後にまとめて計算する。
+
+    Attributes:
+        analyzer (SourceAnalyzer): グラフを保持するアナライザーインスタンス
+        max_workers (int): 1つの波を並列に解析するスレッド数
+        shared (Optional[SharedParses]): 他のアナライザーと共有する解析結果
+    """
+
+    def __init__(
+        self,
+        analyzer: SourceAnalyzer,
+        max_workers: int = 1,
+        shared: Optional[SharedParses] = None,
+    ):
+        self.analyzer = analyzer
+        self.max_workers = max(1, max_workers)
+        self.shared = shared
+
+    def traverse(self, file_path: str, parse: bool = True) -> List[str]:
+        """起点から到達可能なファイルを解析して列挙する
+
+        Notes:
+            - 解析済みのファイルはグラフ上の結果を再利用し、再解析しない
+            - 読み込みや構文解析に失敗したファイルは依存関係なしとして登録する
+
+        Args:
+            file_path (str): 起点となるファイルの正規化されたパス
+            parse (bool): 未解析のファイルを解析するか。Falseの場合はグラフを
+                変更せず、未解析のファイルは存在しないものとして扱う
+
+        Returns:
+            List[str]: 起点を含む到達可能なファイルのリスト（発見順）
+        """
+        reachable: List[str] = []
+        visited: Set[str] = {file_path}
+        frontier = [file_path]
+
+        while frontier:
+            if parse:
+                wave = [
+                    path for path in frontier if path not in self.analyzer.dependencies
+                ]
+                for path, (imports, watch_dirs) in self._parse_wave(wave).items():
+                    self.analyzer.set_file_dependencies(path, imports, watch_dirs)
+
+            next_frontier: List[str] = []
+            for path in frontier:
+                # 存在しないファイルはグラフに登録されない
+                if path not in self.analyzer.dependencies:
+                    continue
+                reachable.append(path)
+                for dependency in sorted(self.analyzer.dependencies[path]):
+                    if dependency not in visited:
+                        visited.add(dependency)
+                        next_frontier.append(dependency)
+            frontier = next_frontier
+
+        return reachable
+
+    def analyze(self, file_path: str, parse: bool = True) -> Dict[str, List[str]]:
+        """起点から到達可能なすべてのファイルの再帰的な依存関係を取得する
+
+        Args:
+            file_path (str): 起点となるファイルの正規化されたパス
+            parse (bool): 未解析のファイルを解析するか
+
+        Returns:
+            Dict[str, List[str]]: 到達可能なファイルごとの完全な依存関係
+        """
+        reachable = self.traverse(file_path, parse)
+        return {
+            path: self.analyzer.get_recursive_dependencies(path) for path in reachable
+        }
+
+    def parse_files(self, paths: List[str]) -> List[Tuple[str, Optional[Set[str]]]]:
+        """ファイルを解析する（グラフは変更しない）
+
+        Args:
+            paths (List[str]): 解析対象のファイルパスのリスト
+
+        Returns:
+            List[Tuple[str, Optional[Set[str]]]]: ファイルパスとインポートの集合の組。
+                ファイルが存在しない場合はNone
+        """
+        return [
+            (path, imports) for path, (imports, _) in zip(paths, self._parse_all(paths))
+        ]
+
+    def _parse_wave(self, wave: List[str]) -> Dict[str, Tuple[Set[str], Set[str]]]:
+        """1つの波に含まれる未解析ファイルを解析する
+
+        Args:
+            wave (List[str]): 未解析ファイルのパスのリスト
+
+        Returns:
+            Dict[str, Tuple[Set[str], Set[str]]]: 存在するファイルごとの
+                インポートの集合と監視すべきディレクトリの集合
+        """
+        return {
+            path: (imports, watch_dirs)
+            for path, (imports, watch_dirs) in zip(wave, self._parse_all(wave))
+            if imports is not None
+        }
+
+    def _parse_all(self, paths: List[str]) -> List[Tuple[Optional[Set[str]], Set[str]]]:
+        """ファイルを順に、または並列に解析する"""
+        if self.max_workers > 1 and len(paths) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                return list(executor.map(self._parse, paths))
+        return [self._parse(path) for path in paths]
+
+    def _parse(self, file_path: str) -> Tuple[Optional[Set[str]], Set[str]]:
+        """ファイルを解析する
+
+        Args:
+            file_path (str): 解析対象のファイルパス
+
+        Returns:
+            Tuple[Optional[Set[str]], Set[str]]: インポートの集合（ファイルが
+                存在しない場合はNone）と、未解決のインポートの解決結果を変えうる
+                ディレクトリの集合
+        """
+        watch_dirs: Set[str] = set()
+        imports = self.analyzer.try_parse_file(Path(file_path), watch_dirs, self.shared)
+        return imports, watch_dirs
@@ -1,5 +1,22 @@
+import os
+import stat
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional, Set
+
+# プロジェクトルートを示すファイル・ディレクトリ
+PROJECT_ROOT_MARKERS = (
+    ".git",
+    "tsconfig.json",
+    "package.json",
+    "pyproject.toml",
+    "Cargo.toml",
+    "Gemfile",
+)
+
+# 解決できなかったインポート候補を記録するスレッドごとの状態
+_probe_state = threading.local()
 
 
 def normalize_path(path: Path, base_dir: Path) -> str:
@@ -10,6 +27,129 @@ def normalize_path(path: Path, base_dir: Path) -> str:
         return str(path)
 
 
+@contextmanager
+def record_missing_paths(missing: Set[Path]) -> Iterator[Set[Path]]:
+    """ブロック内で path_exists が見つけられなかったパスを記録する
+
+    Notes:
+        - 記録はスレッドごとに行うため、複数のファイルを並列に解析できる
+
+    Args:
+        missing: 見つからなかったパスを追加する集合
+
+    Yields:
+        記録先の集合
+    """
+    previous = getattr(_probe_state, "missing", None)
+    _probe_state.missing = missing
+    try:
+        yield missing
+    finally:
+        _probe_state.missing = previous
+
+
+def path_exists(path: Path) -> bool:
+    """パスが存在するかを判定する
+
+    Notes:
+        - record_missing_paths のブロック内では、存在しないパスを記録する
+
+    Args:
+        path: 判定するパス
+
+    Returns:
+        存在する場合はTrue
+    """
+    if path.exists():
+        return True
+    missing = getattr(_probe_state, "missing", None)
+    if missing is not None:
+        missing.add(path)
+    return False
+
+
+def nearest_existing_dir(path: Path) -> Path:
+    """パス自身またはその祖先のうち、存在する最も近いディレクトリを返す
+
+    Args:
+        path: 起点となるパス（存在しなくてもよい）
+
+    Returns:
+        存在する最も近いディレクトリ
+    """
+    current = path
+    while not current.is_dir() and current != current.parent:
+        current = current.parent
+    return current
+
+
+def ensure_private_dir(directory: Path) -> Path:
+    """現在のユーザーのみがアクセスできるディレクトリを用意する
+
+    Args:
+        directory: 用意するディレクトリ
+
+    Returns:
+        用意したディレクトリ
+
+    Raises:
+        PermissionError: 既存のディレクトリが他のユーザーの所有、
+            シンボリックリンク、または他のユーザーからアクセス可能な場合
+    """
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not hasattr(os, "getuid"):
+        return directory
+
+    info = os.lstat(directory)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or info.st_mode & 0o077
+    ):
+        raise PermissionError(f"{directory} is not a private directory of this user")
+    return directory
+
+
+def find_project_root(start: Path) -> Path:
+    """ディレクトリから祖先を辿り、最も近いプロジェクトルートを返す
+
+    Args:
+        start: 探索を始めるディレクトリ
+
+    Returns:
+        PROJECT_ROOT_MARKERS のいずれかを含む最も近いディレクトリ。
+        見つからない場合は start の絶対パス
+    """
+    start = start.absolute()
+    for directory in (start, *start.parents):
+        if any((directory / marker).exists() for marker in PROJECT_ROOT_MARKERS):
+            return directory
+    return start
+
+
+def relative_path(path: str, root: Path) -> str:
+    """プロジェクトルートからの相対パスを返す
+
+    Args:
+        path: 絶対パス
+        root: プロジェクトルート
+
+    Notes:
+        - シンボリックリンク経由のルートでも同じファイルが同じ相対パスになるよう、
+          ルートの絶対パスに加えて実体のパスとも比較する
+
+    Returns:
+        ルート配下の場合は相対パス、それ以外の場合は元のパス
+    """
+    file_path = Path(path)
+    for candidate in (root.absolute(), root.resolve()):
+        try:
+            return file_path.relative_to(candidate).as_posix()
+        except ValueError:
+            continue
+    return path
+
+
 def resolve_relative_path(
     import_path: str,
     current_file: Path,
@@ -33,7 +173,7 @@ def resolve_relative_path(
     """
     # 拡張子付きの場合は直接チェック
     absolute_path = (current_file.parent / import_path).resolve()
-    if absolute_path.exists():
+    if path_exists(absolute_path):
         return absolute_path
 
     # ベースパスを計算（拡張子なしの場合）
@@ -43,7 +183,7 @@ def resolve_relative_path(
     # 1. 拡張子を補完
     for ext in possible_exts:
         test_path = base_path.with_suffix(ext)
-        if test_path.exists():
+        if path_exists(test_path):
             return test_path
 
     # 2. ディレクトリ内のindex/mod/initファイル
@@ -52,19 +192,19 @@ def resolve_relative_path(
         if allow_index:
             for ext in possible_exts:
                 index_path = base_path / f"index{ext}"
-                if index_path.exists():
+                if path_exists(index_path):
                     return index_path
 
         # Rustのmod.rs
         if allow_mod:
             mod_path = base_path / "mod.rs"
-            if mod_path.exists():
+            if path_exists(mod_path):
                 return mod_path
 
         # Pythonの__init__.py
         if allow_init:
             init_path = base_path / "__init__.py"
-            if init_path.exists():
+            if path_exists(init_path):
                 return init_path
 
     return None
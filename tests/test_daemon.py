@@ -0,0 +1,76 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src import daemon
+from src.service import RelationService
+from src.utils.path import ensure_private_dir
+
+
+@unittest.skipUnless(hasattr(os, "getuid"), "POSIX only")
+class DaemonTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self._temp_dir.name)
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def test_default_socket_is_in_private_directory(self) -> None:
+        with mock.patch.dict(os.environ, {}, clear=True):
+            socket_path = Path(daemon.default_socket_path())
+
+        self.assertEqual(
+            socket_path.parent,
+            Path(tempfile.gettempdir()) / f"source-relation-{os.getuid()}",
+        )
+
+    def test_shared_directory_is_rejected(self) -> None:
+        shared = self.root / "shared"
+        shared.mkdir(mode=0o755)
+        os.chmod(shared, 0o755)
+
+        with self.assertRaises(PermissionError):
+            ensure_private_dir(shared)
+
+    def test_request_refuses_non_socket_path(self) -> None:
+        fake_socket = self.root / "daemon.sock"
+        fake_socket.write_text("")
+
+        with self.assertRaises(PermissionError):
+            daemon.request(str(fake_socket), "get_source_relation", {})
+
+    def test_serve_keeps_non_socket_file(self) -> None:
+        notes = self.root / "notes.txt"
+        notes.write_text("keep")
+
+        with self.assertRaises(PermissionError):
+            daemon.serve(RelationService(), str(notes))
+        self.assertEqual(notes.read_text(), "keep")
+
+    @mock.patch.object(daemon.signal, "signal")
+    def test_request_round_trip(self, _signal: mock.Mock) -> None:
+        (self.root / "a.py").write_text("")
+        socket_path = str(self.root / "daemon.sock")
+        thread = threading.Thread(
+            target=daemon.serve, args=(RelationService(), socket_path), daemon=True
+        )
+        thread.start()
+        for _ in range(100):
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.01)
+
+        result = daemon.request(
+            socket_path, "get_source_relation", {"path": str(self.root)}
+        )
+
+        self.assertEqual(result["dependencies"], {str(self.root / "a.py"): []})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from src.graph_cache import GraphCache
+
+
+class GraphCacheTest(unittest.TestCase):
+    def test_unchanged_graph_keeps_its_version(self) -> None:
+        cache = GraphCache()
+        first = cache.update("a", {"x": ["y"], "y": []})
+        second = cache.update("a", {"y": [], "x": ["y", "y"]})
+
+        self.assertEqual(second, first)
+        self.assertEqual(cache.get("a", first), {"x": ["y"], "y": []})
+
+    def test_least_recently_used_graphs_are_evicted(self) -> None:
+        cache = GraphCache(max_graphs=2)
+        first = cache.update("a", {"x": []})
+        second = cache.update("b", {"x": []})
+        cache.update("a", {"x": []})
+        third = cache.update("c", {"x": []})
+
+        self.assertIsNotNone(cache.get("a", first))
+        self.assertIsNone(cache.get("b", second))
+        self.assertIsNotNone(cache.get("c", third))
+
+    def test_history_is_bounded_by_total_entries(self) -> None:
+        # 1つのバージョンは4要素（ファイル2つとエッジ2本）
+        cache = GraphCache(max_entries=10)
+        old = cache.update("a", {"x": ["y"], "y": ["z"]})
+        latest = cache.update("a", {"x": ["z"], "y": ["z"]})
+        other = cache.update("b", {"x": ["y"], "y": ["z"]})
+
+        self.assertIsNone(cache.get("a", old))
+        self.assertIsNotNone(cache.get("a", latest))
+        self.assertIsNotNone(cache.get("b", other))
+
+    def test_oversized_graph_keeps_latest_version(self) -> None:
+        cache = GraphCache(max_entries=2)
+        graph = {f"f{i}": [f"f{i + 1}"] for i in range(10)}
+        version = cache.update("a", graph)
+
+        self.assertEqual(cache.update("a", graph), version)
+        self.assertIsNotNone(cache.get("a", version))
+
+    def test_discard_group(self) -> None:
+        cache = GraphCache()
+        version = cache.update("a", {"x": []}, group="project")
+        other = cache.update("b", {"x": []}, group="other")
+
+        cache.discard_group("project")
+
+        self.assertIsNone(cache.get("a", version))
+        self.assertIsNotNone(cache.get("b", other))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,272 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.service import RelationService
+from src.source_analyzer import SourceAnalyzer
+
+
+class RelationServiceTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self._temp_dir.name)
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def test_batch_matches_single_queries(self) -> None:
+        app = self.root / "app"
+        web = self.root / "web"
+        (app / "lib").mkdir(parents=True)
+        web.mkdir()
+        (app / "tsconfig.json").write_text(
+            json.dumps({"compilerOptions": {"baseUrl": ".", "paths": {"@/*": ["*"]}}}),
+            encoding="utf-8",
+        )
+        (app / "index.ts").write_text("import { u } from '@/lib/util'\n")
+        (app / "lib" / "util.ts").write_text("export const u = 1\n")
+        (web / "main.ts").write_text("import './missing'\n")
+        targets = [str(app), str(web), str(app / "index.ts")]
+
+        batch = RelationService().get_source_relations(targets)["results"]
+
+        for target in targets:
+            single = RelationService().get_source_relation(target)
+            self.assertEqual(batch[target]["dependencies"], single["dependencies"])
+        self.assertEqual(
+            batch[str(app)]["dependencies"][str(app / "index.ts")],
+            [str(app / "lib" / "util.ts")],
+        )
+
+    def test_batch_parses_shared_dependencies_once(self) -> None:
+        (self.root / "a").mkdir()
+        (self.root / "b").mkdir()
+        (self.root / "lib").mkdir()
+        (self.root / "a" / "x.ts").write_text("import { z } from '../lib/z'\n")
+        (self.root / "b" / "y.ts").write_text("import { z } from '../lib/z'\n")
+        (self.root / "lib" / "z.ts").write_text("import { w } from './w'\n")
+        (self.root / "lib" / "w.ts").write_text("export const w = 1\n")
+        targets = [str(self.root / "a" / "x.ts"), str(self.root / "b" / "y.ts")]
+        parses = self._count_parses()
+
+        batch = RelationService().get_source_relations(targets)["results"]
+
+        self.assertEqual(parses.call_count, 4)
+        for target in targets:
+            single = RelationService().get_source_relation(target)
+            self.assertEqual(batch[target]["dependencies"], single["dependencies"])
+
+    def test_undecodable_file_is_a_leaf_in_every_mode(self) -> None:
+        (self.root / "a.py").write_text("import b\n")
+        (self.root / "b.py").write_bytes(b"\xff\xfe\x00")
+        a_path = str(self.root / "a.py")
+        b_path = str(self.root / "b.py")
+        expected = {a_path: [b_path], b_path: []}
+        service = RelationService()
+
+        first = service.get_source_relation(str(self.root))["dependencies"]
+        second = service.get_source_relation(str(self.root))["dependencies"]
+        file_query = RelationService().get_source_relation(a_path)["dependencies"]
+
+        self.assertEqual(first, expected)
+        self.assertEqual(second, expected)
+        self.assertEqual(file_query, expected)
+
+    def _count_parses(self) -> mock.Mock:
+        """SourceAnalyzer.parse_file の呼び出しを数えるモックを適用する"""
+        patcher = mock.patch.object(
+            SourceAnalyzer,
+            "parse_file",
+            autospec=True,
+            side_effect=SourceAnalyzer.parse_file,
+        )
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def _touch(self, path: Path, content: str) -> None:
+        """ファイルを書き換え、更新時刻を確実に進める"""
+        mtime = path.stat().st_mtime
+        path.write_text(content)
+        os.utime(path, (mtime + 10, mtime + 10))
+
+    def test_unchanged_queries_do_not_parse(self) -> None:
+        (self.root / "a.py").write_text("import b\n")
+        (self.root / "b.py").write_text("")
+        service = RelationService()
+        first = service.get_source_relation(str(self.root))
+        parses = self._count_parses()
+
+        second = service.get_source_relation(str(self.root))
+        service.get_source_relation(str(self.root / "a.py"))
+
+        self.assertEqual(parses.call_count, 0)
+        self.assertEqual(second, first)
+
+    def test_changed_file_is_reparsed_for_directory_query(self) -> None:
+        (self.root / "a.py").write_text("import b\n")
+        (self.root / "b.py").write_text("")
+        (self.root / "c.py").write_text("")
+        service = RelationService()
+        service.get_source_relation(str(self.root))
+
+        self._touch(self.root / "a.py", "import c\n")
+        # 同じ基準ディレクトリのファイルクエリが変更を先に反映する
+        service.get_source_relation(str(self.root / "b.py"))
+        result = service.get_source_relation(str(self.root))
+
+        self.assertEqual(
+            result["dependencies"][str(self.root / "a.py")],
+            [str(self.root / "c.py")],
+        )
+
+    def test_created_import_target_is_picked_up(self) -> None:
+        (self.root / "tsconfig.json").write_text(
+            json.dumps({"compilerOptions": {"paths": {"@/*": ["src/*"]}}}),
+            encoding="utf-8",
+        )
+        # 候補のディレクトリは存在するが、解析済みのファイルを含まない
+        (self.root / "lib").mkdir()
+        (self.root / "lib" / "other.ts").write_text("")
+        (self.root / "src").mkdir()
+        (self.root / "src" / "other.ts").write_text("")
+        main = self.root / "main.ts"
+        main.write_text("import { u } from './lib/util'\nimport { v } from '@/v'\n")
+        service = RelationService()
+        before = service.get_source_relation(str(main))
+
+        (self.root / "lib" / "util.ts").write_text("")
+        (self.root / "src" / "v.ts").write_text("")
+        after = service.get_source_relation(str(main))
+
+        self.assertEqual(before["dependencies"], {str(main): []})
+        self.assertEqual(
+            after["dependencies"],
+            RelationService().get_source_relation(str(main))["dependencies"],
+        )
+        self.assertEqual(len(after["dependencies"][str(main)]), 2)
+
+    def test_created_python_module_is_picked_up(self) -> None:
+        (self.root / "src").mkdir()
+        (self.root / "src" / "other.py").write_text("")
+        main = self.root / "main.py"
+        main.write_text("import helpers\n")
+        service = RelationService()
+        service.get_source_relation(str(main))
+
+        (self.root / "src" / "helpers.py").write_text("")
+        result = service.get_source_relation(str(main))
+
+        self.assertEqual(
+            result["dependencies"][str(main)], [str(self.root / "src" / "helpers.py")]
+        )
+
+    def test_ignored_directories_do_not_reset_graph(self) -> None:
+        (self.root / ".git").mkdir()
+        (self.root / "a.py").write_text("import b\n")
+        (self.root / "b.py").write_text("")
+        service = RelationService()
+        service.get_source_relation(str(self.root))
+        parses = self._count_parses()
+
+        # git コマンドが作成・削除するロックファイル
+        (self.root / ".git" / "index.lock").write_text("")
+        (self.root / ".git" / "index.lock").unlink()
+        service.get_source_relation(str(self.root))
+
+        self.assertEqual(parses.call_count, 0)
+
+    def test_versions_from_another_instance_are_unknown(self) -> None:
+        (self.root / "a.py").write_text("")
+        first = RelationService().get_source_relation(str(self.root))
+        (self.root / "b.py").write_text("import a\n")
+
+        second = RelationService().get_source_relation(
+            str(self.root), since=first["version"]
+        )
+
+        self.assertNotIn("not_modified", second)
+        self.assertIn(str(self.root / "b.py"), second["dependencies"])
+
+    def test_since_returns_not_modified_and_delta(self) -> None:
+        (self.root / "a.py").write_text("")
+        service = RelationService()
+        first = service.get_source_relation(str(self.root))
+
+        unchanged = service.get_source_relation(str(self.root), since=first["version"])
+        (self.root / "b.py").write_text("import a\n")
+        changed = service.get_source_relation(str(self.root), since=first["version"])
+
+        self.assertEqual(unchanged, {"version": first["version"], "not_modified": True})
+        self.assertEqual(
+            changed["delta"]["added"],
+            {str(self.root / "b.py"): [str(self.root / "a.py")]},
+        )
+
+    def test_evicting_project_discards_graph_history(self) -> None:
+        first = self.root / "first"
+        second = self.root / "second"
+        for directory in (first, second):
+            directory.mkdir()
+            (directory / "a.py").write_text("")
+        service = RelationService(max_projects=1)
+
+        version = service.get_source_relation(str(first))["version"]
+        service.get_source_relation(str(second))
+
+        # 破棄されたプロジェクトのバージョンは未知として全体を返す
+        result = service.get_source_relation(str(first), since=version)
+        self.assertIn("dependencies", result)
+        self.assertNotIn("not_modified", result)
+
+    def test_direct_mode_through_symlinked_root(self) -> None:
+        real = self.root / "real"
+        (real / "lib").mkdir(parents=True)
+        (real / "tsconfig.json").write_text(
+            json.dumps({"compilerOptions": {"baseUrl": ".", "paths": {"@/*": ["*"]}}}),
+            encoding="utf-8",
+        )
+        (real / "index.ts").write_text("import { u } from '@/lib/util'\n")
+        (real / "lib" / "util.ts").write_text("export const u = 1\n")
+        link = self.root / "link"
+        link.symlink_to(real, target_is_directory=True)
+
+        result = RelationService().get_source_relation(str(link), mode="direct")
+
+        self.assertEqual(sorted(result["paths"]), ["index.ts", "lib/util.ts"])
+        index = result["paths"].index("index.ts")
+        self.assertEqual(result["edges"][index], [result["paths"].index("lib/util.ts")])
+
+    def test_direct_mode_relative_to_project_root(self) -> None:
+        (self.root / "tsconfig.json").write_text("{}", encoding="utf-8")
+        (self.root / "src" / "app").mkdir(parents=True)
+        (self.root / "src" / "lib").mkdir()
+        main = self.root / "src" / "app" / "main.ts"
+        main.write_text("import { u } from '../lib/util'\n")
+        (self.root / "src" / "lib" / "util.ts").write_text("import './types'\n")
+        (self.root / "src" / "lib" / "types.ts").write_text("")
+        service = RelationService()
+
+        result = service.get_source_relation(
+            str(main), mode="direct", closure_for=["src/app/../lib/util.ts"]
+        )
+        parses = self._count_parses()
+        repeated = service.get_source_relation(
+            str(main), mode="direct", closure_for=["src/app/../lib/util.ts"]
+        )
+
+        self.assertEqual(result["root"], str(self.root))
+        self.assertEqual(
+            result["paths"],
+            ["src/app/main.ts", "src/lib/util.ts", "src/lib/types.ts"],
+        )
+        self.assertEqual(result["edges"], [[1], [2], []])
+        self.assertEqual(result["closures"], {"src/lib/util.ts": ["src/lib/types.ts"]})
+        self.assertEqual(repeated, result)
+        self.assertEqual(parses.call_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
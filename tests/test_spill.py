@@ -0,0 +1,130 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src import spill
+from src.service import RelationService
+
+
+class SpillTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self._temp_dir.name)
+        self.exports = self.root / "exports"
+        patcher = mock.patch.dict(os.environ, {spill.EXPORT_DIR_ENV: str(self.exports)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def test_spill_streams_closure(self) -> None:
+        (self.root / "src").mkdir()
+        (self.root / "src" / "a.py").write_text("import b\n")
+        (self.root / "src" / "b.py").write_text("import c\n")
+        (self.root / "src" / "c.py").write_text("")
+        out = io.StringIO()
+
+        spill.spill_to_stream(
+            str(self.root / "src" / "a.py"),
+            out,
+            str(self.root / "graph.db"),
+            1,
+            None,
+            2,
+        )
+
+        dependencies = json.loads(out.getvalue())["dependencies"]
+        self.assertEqual(
+            sorted(dependencies[str(self.root / "src" / "a.py")]),
+            [str(self.root / "src" / "b.py"), str(self.root / "src" / "c.py")],
+        )
+
+    def test_directory_spill_matches_in_memory_analysis(self) -> None:
+        (self.root / "src").mkdir()
+        (self.root / "src" / "a.py").write_text("import b\n")
+        (self.root / "src" / "b.py").write_text("import c\n")
+        (self.root / "src" / "c.py").write_text("import a\n")
+        (self.root / "src" / "d.py").write_text("")
+        out = io.StringIO()
+
+        count = spill.spill_to_stream(
+            str(self.root / "src"), out, str(self.root / "graph.db")
+        )
+
+        dependencies = json.loads(out.getvalue())["dependencies"]
+        expected = RelationService().get_source_relation(str(self.root / "src"))
+        self.assertEqual(count, 4)
+        self.assertEqual(
+            {path: sorted(deps) for path, deps in dependencies.items()},
+            expected["dependencies"],
+        )
+
+    def test_dependents_of(self) -> None:
+        (self.root / "src").mkdir()
+        (self.root / "src" / "a.py").write_text("import b\n")
+        (self.root / "src" / "b.py").write_text("import c\n")
+        (self.root / "src" / "c.py").write_text("")
+        (self.root / "src" / "d.py").write_text("")
+        out = io.StringIO()
+
+        spill.spill_to_stream(
+            str(self.root / "src"),
+            out,
+            str(self.root / "graph.db"),
+            dependents_of=["c.py", "d.py"],
+        )
+
+        dependents = json.loads(out.getvalue())["dependents"]
+        self.assertEqual(
+            sorted(dependents[str(self.root / "src" / "c.py")]),
+            [str(self.root / "src" / "a.py"), str(self.root / "src" / "b.py")],
+        )
+        self.assertEqual(dependents[str(self.root / "src" / "d.py")], [])
+
+    def test_export_stays_in_export_directory(self) -> None:
+        with spill.open_export("result.json") as (output, out):
+            out.write("{}")
+        self.assertEqual(output, self.exports.resolve() / "result.json")
+        self.assertEqual(output.read_text(), "{}")
+
+        with self.assertRaises(PermissionError):
+            with spill.open_export("../outside.json"):
+                pass
+        with self.assertRaises(PermissionError):
+            with spill.open_export(str(self.root / "outside.json")):
+                pass
+        with self.assertRaises(FileExistsError):
+            with spill.open_export("result.json"):
+                pass
+        self.assertEqual(output.read_text(), "{}")
+
+    def test_failed_export_leaves_nothing_behind(self) -> None:
+        with self.assertRaises(RuntimeError):
+            with spill.open_export("result.json") as (_, out):
+                out.write("{")
+                raise RuntimeError("analysis failed")
+        self.assertEqual(list(self.exports.iterdir()), [])
+
+        with spill.open_export("result.json") as (output, out):
+            out.write("{}")
+        self.assertEqual(output.read_text(), "{}")
+
+    def test_export_does_not_follow_symlinks(self) -> None:
+        victim = self.root / "victim.txt"
+        victim.write_text("keep")
+        spill.export_dir()
+        (self.exports / "link.json").symlink_to(victim)
+
+        with self.assertRaises(FileExistsError):
+            with spill.open_export("link.json"):
+                pass
+        self.assertEqual(victim.read_text(), "keep")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.source_analyzer import SourceAnalyzer
+from src.traversal import DependencyTraversal
+
+
+def _write_chain(directory: Path, length: int) -> None:
+    """m0 -> m1 -> ... -> m{length-1} と依存する Python ファイルを作成する"""
+    for i in range(length):
+        content = f"import m{i + 1}\n" if i + 1 < length else ""
+        (directory / f"m{i}.py").write_text(content, encoding="utf-8")
+
+
+class DependencyTraversalTest(unittest.TestCase):
+    def test_long_chain_closure_is_fast(self) -> None:
+        length = 1500
+        with tempfile.TemporaryDirectory() as temp_dir:
+            directory = Path(temp_dir)
+            _write_chain(directory, length)
+            start = str((directory / "m0.py").absolute())
+
+            started = time.perf_counter()
+            dependencies = DependencyTraversal(SourceAnalyzer(temp_dir)).analyze(start)
+            elapsed = time.perf_counter() - started
+
+        self.assertEqual(len(dependencies), length)
+        self.assertEqual(len(dependencies[start]), length - 1)
+        # 再帰的な依存関係を毎回辿り直すと数分かかる規模
+        self.assertLess(elapsed, 10.0)
+
+    def test_cycle_includes_every_member(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            directory = Path(temp_dir)
+            (directory / "a.py").write_text("import b\n", encoding="utf-8")
+            (directory / "b.py").write_text("import c\n", encoding="utf-8")
+            (directory / "c.py").write_text("import a\nimport d\n", encoding="utf-8")
+            (directory / "d.py").write_text("", encoding="utf-8")
+            paths = {
+                name: str((directory / f"{name}.py").absolute()) for name in "abcd"
+            }
+
+            dependencies = DependencyTraversal(SourceAnalyzer(temp_dir)).analyze(
+                paths["a"]
+            )
+
+        cycle = sorted(paths[name] for name in "abcd")
+        for name in "abc":
+            self.assertEqual(dependencies[paths[name]], cycle)
+        self.assertEqual(dependencies[paths["d"]], [])
+
+    def test_shared_dependencies_are_parsed_once(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            directory = Path(temp_dir)
+            (directory / "a.py").write_text("import c\n", encoding="utf-8")
+            (directory / "b.py").write_text("import c\n", encoding="utf-8")
+            (directory / "c.py").write_text("import d\n", encoding="utf-8")
+            (directory / "d.py").write_text("", encoding="utf-8")
+            traversal = DependencyTraversal(SourceAnalyzer(temp_dir), max_workers=2)
+
+            with mock.patch.object(
+                SourceAnalyzer,
+                "parse_file",
+                autospec=True,
+                side_effect=SourceAnalyzer.parse_file,
+            ) as parses:
+                first = traversal.analyze(str((directory / "a.py").absolute()))
+                second = traversal.analyze(str((directory / "b.py").absolute()))
+
+        self.assertEqual(parses.call_count, 4)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()